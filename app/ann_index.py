@@ -0,0 +1,158 @@
+"""
+FAISS index construction.
+
+Ingest used to hardcode IndexFlatIP (exact brute force). That is the right
+choice for one museum, but not for a regional archive with hundreds of
+thousands of chunks, so the index type is configurable:
+
+- flat   exact inner product (cosine on normalized vectors), the reference
+- hnsw   graph index, no training, fast and accurate, larger in memory
+- ivf    inverted lists over a k-means coarse quantizer, needs training
+- ivfpq  IVF with product-quantized vectors, smallest in memory
+
+With EMBED_DTYPE=float16|int8 the flat, hnsw and ivf types store their
+vectors through FAISS' scalar quantizer (2 or 1 bytes per dimension instead
+of 4); ivfpq is already compressed and ignores it.
+
+The chosen type and its search-time parameters are written next to the index
+in index_info.json. The server does not read faiss.index: it routes on room
+embeddings and answers from whole rooms. The index and `python app/ingest.py
+bench` are for offline evaluation of chunk-level search.
+"""
+import json
+import os
+from typing import Optional
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEX_NAME = "faiss.index"
+INDEX_INFO_NAME = "index_info.json"
+EMBEDDINGS_NAME = "embeddings.npy"
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+# Defaults, overridable from .env
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat").lower()
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = about 4 * sqrt(n)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+PQ_M = int(os.getenv("PQ_M", "16"))  # sub-quantizers, must divide the dimension
+PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))
+EMBED_DTYPE = os.getenv("EMBED_DTYPE", "float32").lower()  # float32 | float16 | int8
+
+
+def _sq_type(dtype: str):
+    return {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}.get(dtype)
+
+
+def default_params(index_type: str) -> dict:
+    if index_type == "hnsw":
+        return {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH}
+    if index_type == "ivf":
+        return {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE}
+    if index_type == "ivfpq":
+        return {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE, "pq_m": PQ_M, "pq_nbits": PQ_NBITS}
+    return {}
+
+
+def _auto_nlist(n: int, requested: int) -> int:
+    nlist = requested or int(4 * np.sqrt(n))
+    # k-means wants ~39 training points per centroid; stay well inside that
+    return max(1, min(nlist, n // 39 or 1))
+
+
+def build_index(
+    emb: np.ndarray,
+    index_type: str = INDEX_TYPE,
+    params: Optional[dict] = None,
+    dtype: str = EMBED_DTYPE,
+):
+    """
+    Build and fill an inner-product index of the requested type, storing
+    vectors as float32 or, with dtype float16/int8, scalar-quantized.
+
+    Returns (index, params) where params are the values actually used
+    (e.g. nlist after clamping to the corpus size).
+    """
+    index_type = index_type.lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE {index_type!r}, expected one of {', '.join(INDEX_TYPES)}")
+
+    emb = np.ascontiguousarray(emb, dtype=np.float32)
+    n, d = emb.shape
+    params = {**default_params(index_type), **(params or {})}
+    sq = _sq_type(dtype) if index_type != "ivfpq" else None
+    if sq is not None:
+        params["dtype"] = dtype
+
+    if index_type == "flat":
+        if sq is not None:
+            index = faiss.IndexScalarQuantizer(d, sq, faiss.METRIC_INNER_PRODUCT)
+            index.train(emb)
+        else:
+            index = faiss.IndexFlatIP(d)  # cosine via normalized vectors
+
+    elif index_type == "hnsw":
+        if sq is not None:
+            index = faiss.IndexHNSWSQ(d, sq, params["m"], faiss.METRIC_INNER_PRODUCT)
+            index.train(emb)
+        else:
+            index = faiss.IndexHNSWFlat(d, params["m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["ef_construction"]
+
+    else:
+        params["nlist"] = _auto_nlist(n, params["nlist"])
+        quantizer = faiss.IndexFlatIP(d)
+        if index_type == "ivf" and sq is not None:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, d, params["nlist"], sq, faiss.METRIC_INNER_PRODUCT)
+        elif index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, d, params["nlist"], faiss.METRIC_INNER_PRODUCT)
+        else:
+            if d % params["pq_m"] != 0:
+                raise ValueError(f"PQ_M={params['pq_m']} must divide the embedding dimension {d}")
+            if n < (1 << params["pq_nbits"]):
+                raise ValueError(
+                    f"ivfpq needs at least {1 << params['pq_nbits']} vectors to train "
+                    f"PQ_NBITS={params['pq_nbits']}, got {n}; use flat/hnsw/ivf or lower PQ_NBITS"
+                )
+            index = faiss.IndexIVFPQ(
+                quantizer, d, params["nlist"], params["pq_m"], params["pq_nbits"], faiss.METRIC_INNER_PRODUCT
+            )
+        index.train(emb)
+
+    index.add(emb)
+    apply_search_params(index, index_type, params)
+    return index, params
+
+
+def apply_search_params(index, index_type: str, params: dict) -> None:
+    """Set the search-time knobs (efSearch / nprobe) on a loaded index."""
+    if index_type == "hnsw" and "ef_search" in params:
+        faiss.downcast_index(index).hnsw.efSearch = int(params["ef_search"])
+    elif index_type in ("ivf", "ivfpq") and "nprobe" in params:
+        faiss.extract_index_ivf(index).nprobe = int(params["nprobe"])
+
+
+def index_nbytes(index) -> int:
+    """Serialized size of an index, a good proxy for its resident memory."""
+    return int(faiss.serialize_index(index).size)
+
+
+def write_index(index_dir: str, index, index_type: str, params: dict) -> str:
+    path = os.path.join(index_dir, INDEX_NAME)
+    faiss.write_index(index, path)
+    info = {
+        "type": index_type,
+        "params": params,
+        "ntotal": int(index.ntotal),
+        "dim": int(index.d),
+    }
+    with open(os.path.join(index_dir, INDEX_INFO_NAME), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return path
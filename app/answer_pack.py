@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Per-room answer packs for the offline-capable widget.
+
+A pack is a small JSON file with the common questions for one room, in IT
+and EN, and the answers the server gives to them. The widget downloads the
+pack of the room it was opened for (QR room_id), keeps it in its service
+worker cache and answers matching questions locally, so the network is only
+needed for questions the pack cannot answer.
+
+Questions come from a curated CSV (room_id,lang,q) and/or the most frequent
+history-free questions per room in the structured query log. Answers are
+fetched from a running server through the cacheable GET /t/<museum>/answer
+route, so a pack says exactly what the server would say:
+
+    python app/answer_pack.py --museum gda --faq data/faq.csv --query-log "logs/queries-*.jsonl.gz"
+
+Packs are written to <index dir>/answer_packs/<room_id>.json and record the
+museum's content hash; the server stops serving a pack once the index it was
+built from changes.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+import requests
+from dotenv import load_dotenv
+
+# Base directory = repository root (one level above app/)
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Allow both `python app/answer_pack.py` and `python -m app.answer_pack`
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.query_log import iter_records  # noqa: E402
+
+load_dotenv()
+
+INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(BASE_DIR, "index"))
+TENANTS_DIR = os.getenv("TENANTS_DIR", os.path.join(BASE_DIR, "tenants"))
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "gda")
+
+PACK_DIR_NAME = "answer_packs"
+ROOM_FILE_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+def pack_path(index_dir: str, room_id: str) -> Optional[str]:
+    """Path of a room's pack, or None for room ids that are not safe file names."""
+    if not ROOM_FILE_RE.match(room_id) or room_id.startswith("."):
+        return None
+    return os.path.join(index_dir, PACK_DIR_NAME, f"{room_id}.json")
+
+
+def load_pack(index_dir: str, room_id: str) -> Optional[dict]:
+    path = pack_path(index_dir, room_id)
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _norm(q: str) -> str:
+    return " ".join(q.split())
+
+
+def questions_from_csv(path: str) -> list:
+    """(room_id, lang, question) rows from a curated FAQ CSV."""
+    out = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            q = _norm(row.get("q") or "")
+            rid = (row.get("room_id") or "").strip()
+            if q and rid:
+                out.append((rid, (row.get("lang") or "it").strip().lower(), q))
+    return out
+
+
+def questions_from_log(paths: list, museum: str, min_count: int, per_room: int) -> list:
+    """The most frequent history-free questions per (room, language) in the query log."""
+    counts: dict = defaultdict(Counter)
+    for rec in iter_records(paths):
+        req = rec.get("request") or {}
+        if rec.get("museum") != museum or not rec.get("room_id") or req.get("history"):
+            continue
+        if "abstain" in (rec.get("decision") or []):
+            continue
+        lang = "en" if (rec.get("lang") or "").startswith("en") else "it"
+        counts[(rec["room_id"], lang)][_norm(rec.get("question") or "")] += 1
+    out = []
+    for (rid, lang), counter in counts.items():
+        for q, n in counter.most_common(per_room):
+            if q and n >= min_count:
+                out.append((rid, lang, q))
+    return out
+
+
+def build_packs(museum: str, url: str, questions: list) -> dict:
+    """Ask the server every question and group the answers per room."""
+    base = url.rstrip("/") + f"/t/{museum}"
+    session = requests.Session()
+    health = session.get(f"{base}/healthz", timeout=30)
+    health.raise_for_status()
+    content_hash = health.json()["content_hash"]
+
+    packs: dict = {}
+    seen = set()
+    for rid, lang, q in questions:
+        if (rid, lang, q.lower()) in seen:
+            continue
+        seen.add((rid, lang, q.lower()))
+        try:
+            resp = session.get(f"{base}/answer", params={"q": q, "room_id": rid, "lang": lang}, timeout=600)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            print(f"[PACK] {rid} ({lang}) {q!r} failed: {e}")
+            continue
+        if data.get("degradation_level") or data.get("mode") in ("extractive-fallback", "llm-failed"):
+            print(f"[PACK] {rid} ({lang}) {q!r} answered in degraded mode, skipping")
+            continue
+        if data.get("dont_know"):
+            # Sends the visitor to staff: better asked online
+            print(f"[PACK] {rid} ({lang}) {q!r} has no answer, skipping")
+            continue
+        packs.setdefault(rid, []).append(
+            {"q": q, "lang": data.get("lang") or lang, "answer": data["answer"], "citations": data.get("citations", [])}
+        )
+
+    return {
+        rid: {"museum": museum, "room_id": rid, "content_hash": content_hash, "built_at": int(time.time()), "items": items}
+        for rid, items in packs.items()
+    }
+
+
+def write_packs(index_dir: str, packs: dict) -> None:
+    os.makedirs(os.path.join(index_dir, PACK_DIR_NAME), exist_ok=True)
+    for rid, pack in packs.items():
+        path = pack_path(index_dir, rid)
+        if path is None:
+            print(f"[PACK] room id {rid!r} is not a safe file name, skipping")
+            continue
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(pack, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        print(f"Wrote {len(pack['items'])} answers → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-room answer packs for the offline widget.")
+    parser.add_argument("--museum", default=DEFAULT_TENANT)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="running server used to answer")
+    parser.add_argument("--faq", default="", help="CSV with room_id,lang,q columns")
+    parser.add_argument("--query-log", action="append", default=[], help="query log file or glob (repeatable)")
+    parser.add_argument("--min-count", type=int, default=2, help="times a logged question must have been asked")
+    parser.add_argument("--per-room", type=int, default=30, help="logged questions per room and language")
+    args = parser.parse_args()
+
+    questions = questions_from_csv(args.faq) if args.faq else []
+    if args.query_log:
+        questions += questions_from_log(args.query_log, args.museum, args.min_count, args.per_room)
+    if not questions:
+        raise RuntimeError("No questions; pass --faq and/or --query-log.")
+    print(f"Answering {len(questions)} questions for {args.museum} via {args.url}")
+
+    index_dir = INDEX_DIR if args.museum == DEFAULT_TENANT else os.path.join(TENANTS_DIR, args.museum)
+    write_packs(index_dir, build_packs(args.museum, args.url, questions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Token-bounded passage splitting for ingest.
+
+Curated rows in chunks.csv range from one line to a whole room essay. Before
+embedding, ingest cuts every row into passages of at most `max_tokens` tokens
+(counted with the embedding model's own tokenizer), breaking on paragraph and
+sentence boundaries and optionally repeating the last sentences of the
+previous passage as overlap.
+
+Italian drives the cut; the English text of the same row is distributed over
+the same passages by relative position, so passage n in IT and EN covers the
+same part of the row.
+"""
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Sentence end followed by whitespace. Kept deliberately simple: museum
+# panels are mostly plain prose.
+SENT_SPLIT_RE = re.compile(r"(?<=[.!?…;])[\"”»')\]]*\s+")
+PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+
+# (text, is_paragraph_start)
+Unit = Tuple[str, bool]
+# (passage text, number of leading chars repeated from the previous passage)
+Passage = Tuple[str, int]
+
+
+def whitespace_token_count(text: str) -> int:
+    """Fallback token counter when no tokenizer is available."""
+    return len(text.split())
+
+
+def make_token_counter(model) -> Callable[[str], int]:
+    """Count tokens with the SentenceTransformer's tokenizer (no special tokens)."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return whitespace_token_count
+
+    def count(text: str) -> int:
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    return count
+
+
+def model_max_tokens(model, default: int = 256) -> int:
+    """
+    Longest passage the embedder reads in full, in tokens as counted by
+    make_token_counter: max_seq_length minus the special tokens ([CLS]/<s>
+    ...) it adds, which the counter leaves out.
+    """
+    max_seq = model.get_max_seq_length() or default
+    tokenizer = getattr(model, "tokenizer", None)
+    special = tokenizer.num_special_tokens_to_add() if hasattr(tokenizer, "num_special_tokens_to_add") else 0
+    return max(1, max_seq - special)
+
+
+def split_units(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[Unit]:
+    """Split text into sentences (flagging paragraph starts); over-long sentences are cut on words."""
+    units: List[Unit] = []
+    for para in PARA_SPLIT_RE.split(text or ""):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        first = True
+        for sent in SENT_SPLIT_RE.split(para):
+            sent = sent.strip()
+            if not sent:
+                continue
+            if count_tokens(sent) <= max_tokens:
+                units.append((sent, first))
+                first = False
+                continue
+            # Sentence alone is too long: fall back to word windows
+            piece: List[str] = []
+            for word in sent.split():
+                if piece and count_tokens(" ".join(piece + [word])) > max_tokens:
+                    units.append((" ".join(piece), first))
+                    first = False
+                    piece = []
+                piece.append(word)
+            if piece:
+                units.append((" ".join(piece), first))
+                first = False
+    return units
+
+
+def _join(units: List[Unit]) -> str:
+    out = ""
+    for text, para_start in units:
+        if out:
+            out += "\n\n" if para_start else " "
+        out += text
+    return out
+
+
+def _overlap_tail(units: List[Unit], overlap_tokens: int, count_tokens: Callable[[str], int]) -> List[Unit]:
+    """Trailing units of a passage that fit in the overlap budget."""
+    tail: List[Unit] = []
+    used = 0
+    for text, _ in reversed(units):
+        n = count_tokens(text)
+        if used + n > overlap_tokens:
+            break
+        tail.insert(0, (text, False))
+        used += n
+    return tail
+
+
+def pack_units(
+    units: List[Unit],
+    groups: List[List[int]],
+    overlap_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> List[Passage]:
+    """Turn groups of unit indexes into passages, prefixing each with the previous tail as overlap."""
+    passages: List[Passage] = []
+    prev: List[Unit] = []
+    for idx in groups:
+        body = [units[i] for i in idx]
+        if not body:
+            passages.append(("", 0))
+            continue
+        carry = _overlap_tail(prev, overlap_tokens, count_tokens) if (overlap_tokens > 0 and prev) else []
+        if carry:
+            prefix = _join(carry)
+            sep = "\n\n" if body[0][1] else " "
+            passages.append((prefix + sep + _join(body), len(prefix) + len(sep)))
+        else:
+            passages.append((_join(body), 0))
+        prev = body
+    return passages
+
+
+def group_units(units: List[Unit], max_tokens: int, count_tokens: Callable[[str], int]) -> List[List[int]]:
+    """
+    Greedy packing of units into token-bounded groups.
+
+    A new group is started when the next unit would overflow, or at a
+    paragraph start once the current group is at least half full.
+    """
+    groups: List[List[int]] = []
+    cur: List[int] = []
+    cur_tokens = 0
+    for i, (text, para_start) in enumerate(units):
+        n = count_tokens(text)
+        if cur and (cur_tokens + n > max_tokens or (para_start and cur_tokens >= max_tokens // 2)):
+            groups.append(cur)
+            cur, cur_tokens = [], 0
+        cur.append(i)
+        cur_tokens += n
+    if cur:
+        groups.append(cur)
+    return groups
+
+
+def split_aligned(
+    text_it: str,
+    text_en: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    count_tokens: Callable[[str], int] = whitespace_token_count,
+) -> List[Tuple[Passage, Passage]]:
+    """
+    Split one IT/EN row into aligned passages.
+
+    Returns a list of ((text_it, overlap_it), (text_en, overlap_en)). English
+    sentences are assigned to the Italian passage covering the same relative
+    position in the row, keeping their order and giving every passage at
+    least one; when the English has fewer sentences than there are passages
+    it is cut into word windows first. EN is ("", 0) when the row has no
+    English text, and all of it goes on the first passage in the rare case it
+    has fewer words than there are passages.
+    """
+    # Overlap is added on top of the body, so bodies get the remaining budget
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    body_tokens = max_tokens - overlap_tokens
+
+    units_it = split_units(text_it, body_tokens, count_tokens)
+    if not units_it:
+        return []
+    groups_it = group_units(units_it, body_tokens, count_tokens)
+    passages_it = pack_units(units_it, groups_it, overlap_tokens, count_tokens)
+
+    units_en = split_units(text_en, body_tokens, count_tokens) if text_en else []
+    if not units_en:
+        return [(p, ("", 0)) for p in passages_it]
+    if len(groups_it) == 1:
+        return [(passages_it[0], (_join(units_en), 0))]
+    n_groups = len(groups_it)
+    if len(units_en) < n_groups:
+        budget = max(1, sum(count_tokens(u[0]) for u in units_en) // n_groups)
+        units_en = split_units(text_en, budget, count_tokens)
+    if len(units_en) < n_groups:
+        return [(passages_it[0], (_join(units_en), 0))] + [(p, ("", 0)) for p in passages_it[1:]]
+
+    # Relative end position of every IT group, by characters of its units
+    it_lens = np.array([len(u[0]) + 1 for u in units_it], dtype=np.float64)
+    it_ends = np.cumsum([it_lens[g].sum() for g in groups_it]) / it_lens.sum()
+
+    en_lens = np.array([len(u[0]) + 1 for u in units_en], dtype=np.float64)
+    en_mid = (np.cumsum(en_lens) - en_lens / 2) / en_lens.sum()
+
+    # Nearest passage by position, but never skipping one and always leaving
+    # enough units for the passages still ahead
+    groups_en: List[List[int]] = [[] for _ in groups_it]
+    prev = 0
+    for j, pos in enumerate(en_mid):
+        k = min(int(np.searchsorted(it_ends, pos, side="left")), n_groups - 1)
+        k = 0 if j == 0 else max(prev, min(k, prev + 1), n_groups - (len(units_en) - j))
+        groups_en[k].append(j)
+        prev = k
+
+    passages_en = pack_units(units_en, groups_en, overlap_tokens, count_tokens)
+    return list(zip(passages_it, passages_en))
+
+
+def size_report(title: str, sizes: List[int], max_tokens: Optional[int] = None) -> str:
+    """Text summary of a token-size distribution (percentiles + histogram)."""
+    if not sizes:
+        return f"{title}: no chunks"
+    arr = np.asarray(sizes)
+    p10, p50, p90, p99 = np.percentile(arr, [10, 50, 90, 99]).astype(int)
+    lines = [
+        f"{title}: n={len(arr)} min={arr.min()} p10={p10} p50={p50} "
+        f"p90={p90} p99={p99} max={arr.max()} mean={arr.mean():.1f} tokens"
+    ]
+    edges = [0, 16, 32, 64, 128, 256, 512, 1024, 2048]
+    top = int(arr.max())
+    if top >= edges[-1]:
+        edges.append(top + 1)
+    counts, _ = np.histogram(arr, bins=edges)
+    peak = max(int(counts.max()), 1)
+    for lo, hi, c in zip(edges[:-1], edges[1:], counts):
+        if c == 0:
+            continue
+        bar = "#" * max(1, int(40 * c / peak))
+        lines.append(f"  {lo:>5}-{hi - 1:<5} {c:>6}  {bar}")
+    if max_tokens:
+        over = int((arr > max_tokens).sum())
+        lines.append(f"  over {max_tokens} tokens: {over}")
+    return "\n".join(lines)
+
+
+def main():
+    """Self-check of the IT/EN alignment: python app/chunker.py"""
+    it = " ".join(f"Questa è la frase numero {i} del pannello della sala." for i in range(1, 13))
+    en = "This panel describes the room. It has twelve sentences in Italian and far fewer in English."
+    parts = split_aligned(it, en, max_tokens=20)
+    assert len(parts) == 6, len(parts)
+    assert all(text_en for _, (text_en, _) in parts), parts
+    assert " ".join(" ".join(text_en.split()) for _, (text_en, _) in parts) == en, parts
+    print(f"OK: {len(parts)} passages, all with English")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Exact and near-duplicate detection for ingest passages.
+
+Curated rooms often repeat the same paragraphs (shared intros, panel texts
+copied between rooms). The server joins every passage of a room into the
+prompt, so each copy costs context budget on every question.
+
+- exact: same text after lowercasing and dropping punctuation/whitespace
+- near:  word 5-shingles, 128-permutation MinHash, LSH banding for candidate
+         pairs, then the true shingle Jaccard must reach the threshold
+
+Within a room later duplicates are dropped (the first occurrence is kept).
+Across rooms both copies stay, since each room must stay self-contained, but
+they are reported to curators.
+"""
+import csv
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.meta_store import passage_body
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+", re.U)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def exact_key(text: str) -> str:
+    return hashlib.sha1(" ".join(_words(text)).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set:
+    words = _words(text)
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+
+
+def _perms(seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+    b = rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+    return a, b
+
+
+def minhash(sh: set, perms: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    a, b = perms
+    if not sh:
+        return np.full(NUM_PERM, _PRIME, dtype=np.int64)
+    x = np.array([zlib.crc32(s.encode("utf-8")) for s in sh], dtype=np.int64) % _PRIME
+    # (a*x + b) mod p stays inside int64: a, x < 2^31
+    return ((np.outer(x, a) + b) % _PRIME).min(axis=0)
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def find_duplicates(texts: List[str], threshold: float) -> List[Tuple[int, int, float]]:
+    """(i, j, similarity) for every pair i < j that is an exact or near duplicate."""
+    pairs: Dict[Tuple[int, int], float] = {}
+
+    by_key = defaultdict(list)
+    for i, t in enumerate(texts):
+        by_key[exact_key(t)].append(i)
+    for ids in by_key.values():
+        for x in range(len(ids)):
+            for y in range(x + 1, len(ids)):
+                pairs[(ids[x], ids[y])] = 1.0
+
+    perms = _perms()
+    sh = [shingles(t) for t in texts]
+    sigs = np.stack([minhash(s, perms) for s in sh]) if texts else np.zeros((0, NUM_PERM), dtype=np.int64)
+    rows = NUM_PERM // BANDS
+    candidates = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for i in range(len(texts)):
+            buckets[sigs[i, band * rows : (band + 1) * rows].tobytes()].append(i)
+        for ids in buckets.values():
+            for x in range(len(ids)):
+                for y in range(x + 1, len(ids)):
+                    candidates.add((ids[x], ids[y]))
+    for i, j in candidates:
+        if (i, j) in pairs:
+            continue
+        sim = jaccard(sh[i], sh[j])
+        if sim >= threshold:
+            pairs[(i, j)] = sim
+    return sorted((i, j, s) for (i, j), s in pairs.items())
+
+
+def _room_chars(records: List[dict]) -> Dict[str, int]:
+    """Characters the server would put in each room's IT prompt context."""
+    sizes: Dict[str, int] = defaultdict(int)
+    for rec in records:
+        if rec.get("scope_type", "room") == "room":
+            sizes[rec.get("scope_id", "")] += len(passage_body(rec, "it")) + 1
+    return sizes
+
+
+def dedup_records(records: List[dict], threshold: float = 0.85, report_path: str = "") -> List[dict]:
+    """
+    Drop within-room duplicates, print the cross-room overlap and the prompt
+    size reduction, and optionally write every duplicate pair to a CSV.
+    """
+    texts = [passage_body(rec, "it") for rec in records]
+    pairs = find_duplicates(texts, threshold)
+
+    drop = set()
+    cross: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for i, j, _ in pairs:
+        if records[i].get("scope_id", "") == records[j].get("scope_id", "") and i not in drop:
+            drop.add(j)
+    for i, j, _ in pairs:
+        ri, rj = records[i].get("scope_id", ""), records[j].get("scope_id", "")
+        if ri != rj and i not in drop and j not in drop:
+            cross[tuple(sorted((ri, rj)))].append(j)
+
+    kept = [rec for n, rec in enumerate(records) if n not in drop]
+
+    before, after = _room_chars(records), _room_chars(kept)
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"Dedup: threshold={threshold} duplicate pairs={len(pairs)} "
+          f"dropped within rooms={len(drop)} cross-room pairs={sum(len(v) for v in cross.values())}")
+    if total_before:
+        print(f"  room context: {total_before} → {total_after} chars "
+              f"({1 - total_after / total_before:.1%} smaller)")
+    shrunk = sorted(before, key=lambda r: after.get(r, 0) - before[r])[:5]
+    for rid in shrunk:
+        if after.get(rid, 0) < before[rid]:
+            print(f"    {rid}: {before[rid]} → {after.get(rid, 0)} chars")
+    if cross:
+        print("  rooms sharing text (curators may want to merge or link them):")
+        for (ra, rb), ids in sorted(cross.items(), key=lambda kv: -len(kv[1]))[:10]:
+            chars = sum(len(texts[j]) for j in ids)
+            print(f"    {ra} <-> {rb}: {len(ids)} passages, {chars} chars")
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["chunk_id_a", "room_a", "chunk_id_b", "room_b", "similarity", "action", "text_b"])
+            for i, j, sim in pairs:
+                ri, rj = records[i].get("scope_id", ""), records[j].get("scope_id", "")
+                action = "dropped_b" if j in drop else ("cross_room" if ri != rj and i not in drop else "kept")
+                w.writerow([records[i]["chunk_id"], ri, records[j]["chunk_id"], rj, f"{sim:.3f}", action, texts[j][:200]])
+        print(f"  wrote duplicate report → {report_path}")
+    return kept
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Embedding sidecar: one process holding the SentenceTransformer, serving
+encode requests from every uvicorn worker over a Unix socket.
+
+Without it each worker loads its own copy of the model (and of torch). With
+it, workers only keep a small client (RemoteEmbedder) and the model lives
+once in memory. Requests arriving within EMBED_BATCH_WAIT_MS of each other
+are encoded together in one batch.
+
+    python app/embed_sidecar.py                 # listens on EMBED_SOCKET
+    EMBED_SOCKET=/tmp/museum-embed.sock uvicorn app.server:app --workers 4
+
+Wire format, both directions: 4-byte big-endian length + JSON header, then
+for responses the float32 matrix as raw bytes.
+  request:  {"texts": [...], "normalize": true}
+  response: {"shape": [n, d]} + n*d*4 bytes, or {"error": "..."}
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import List, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+EMBED_SOCKET = os.getenv("EMBED_SOCKET", "/tmp/museum-embed.sock")
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+_HEADER = struct.Struct(">I")
+
+
+def _send(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _recv_header(sock: socket.socket) -> dict:
+    (n,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, n).decode("utf-8"))
+
+
+# -------------------------------------------------------------
+# Client side (used by the server workers)
+# -------------------------------------------------------------
+
+
+class RemoteEmbedder:
+    """
+    Drop-in for the parts of SentenceTransformer the server uses:
+    encode(texts, normalize_embeddings=...) returning float32 arrays.
+
+    One connection per calling thread; a broken connection is reopened once.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        self._close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _request(self, texts: List[str], normalize: bool) -> np.ndarray:
+        sock = getattr(self._local, "sock", None) or self._connect()
+        _send(sock, {"texts": texts, "normalize": normalize})
+        header = _recv_header(sock)
+        if "error" in header:
+            raise RuntimeError(f"embedding sidecar: {header['error']}")
+        n, d = header["shape"]
+        raw = _recv_exact(sock, n * d * 4)
+        return np.frombuffer(raw, dtype=np.float32).reshape(n, d)
+
+    def encode(self, sentences: Union[str, List[str]], normalize_embeddings: bool = False, **_) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        try:
+            out = self._request(texts, normalize_embeddings)
+        except (OSError, ConnectionError):
+            # Sidecar restarted or idle connection dropped: reconnect once
+            self._close()
+            out = self._request(texts, normalize_embeddings)
+        return out[0] if single else out
+
+
+# -------------------------------------------------------------
+# Sidecar process
+# -------------------------------------------------------------
+
+
+class _Batcher:
+    """Collects concurrent requests and encodes them as one batch."""
+
+    def __init__(self, model):
+        self.model = model
+        self.pending: queue.Queue = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def submit(self, texts: List[str], normalize: bool) -> np.ndarray:
+        slot = {"texts": texts, "normalize": normalize, "done": threading.Event()}
+        self.pending.put(slot)
+        slot["done"].wait()
+        if "error" in slot:
+            raise slot["error"]
+        return slot["result"]
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.pending.get()]
+            n_texts = len(batch[0]["texts"])
+            deadline = time.monotonic() + EMBED_BATCH_WAIT_MS / 1000
+            while n_texts < EMBED_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    slot = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(slot)
+                n_texts += len(slot["texts"])
+            # normalize_embeddings is per request; encode each flavour once
+            for normalize in (True, False):
+                group = [s for s in batch if s["normalize"] == normalize]
+                if group:
+                    self._encode(group, normalize)
+
+    def _encode(self, group: list, normalize: bool) -> None:
+        texts = [t for s in group for t in s["texts"]]
+        try:
+            embs = np.asarray(
+                self.model.encode(texts, normalize_embeddings=normalize, batch_size=EMBED_BATCH_MAX),
+                dtype=np.float32,
+            )
+            start = 0
+            for s in group:
+                s["result"] = embs[start : start + len(s["texts"])]
+                start += len(s["texts"])
+            self.batches += 1
+            self.texts += len(texts)
+        except Exception as e:
+            for s in group:
+                s["error"] = e
+        for s in group:
+            s["done"].set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        while True:
+            try:
+                req = _recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                embs = self.server.batcher.submit(list(req["texts"]), bool(req.get("normalize", False)))
+            except Exception as e:
+                _send(self.request, {"error": str(e)})
+                continue
+            embs = np.ascontiguousarray(embs, dtype=np.float32)
+            _send(self.request, {"shape": list(embs.shape)}, embs.tobytes())
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBED_MODEL)
+    if os.path.exists(EMBED_SOCKET):
+        os.unlink(EMBED_SOCKET)
+    with _Server(EMBED_SOCKET, _Handler) as server:
+        os.chmod(EMBED_SOCKET, 0o660)
+        server.batcher = _Batcher(model)
+        print(f"[EMBED] {EMBED_MODEL} serving on {EMBED_SOCKET} "
+              f"(batch <= {EMBED_BATCH_MAX}, wait {EMBED_BATCH_WAIT_MS} ms)")
+        try:
+            server.serve_forever()
+        finally:
+            print(f"[EMBED] {server.batcher.batches} batches, {server.batcher.texts} texts")
+            os.unlink(EMBED_SOCKET)
+
+
+if __name__ == "__main__":
+    main()
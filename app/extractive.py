@@ -0,0 +1,124 @@
+"""
+Extractive answers: the room sentences closest to the question, no LLM.
+
+Each room's IT and EN text is split into sentences when a tenant is loaded
+and the sentences are embedded once. At question time the answer is the top
+1-3 sentences of the selected room, in the visitor's language when possible,
+returned in their original order.
+
+The server uses it as an explicit fast mode, as the fallback when Ollama
+fails, and for short factual questions where one sentence matches strongly.
+"""
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+# Sentence end followed by something that starts a new sentence. ":" is not
+# an end ("Lunedì: 09:00"), and a digit does not start one ("int. 1").
+_SENT_RE = re.compile(r"(?<=[.!?;])[\"”»')\]]*\s+(?=[\"'«“(\[A-ZÀ-ÖØ-Ý])")
+# A split after one of these is not a sentence end
+_ABBREV_RE = re.compile(
+    r"(?:\b(?:int|tel|ext|ecc|etc|es|eg|ie|min|max|ca|cfr|vol|fig|pag|pp|sig|dott|prof|st|dr|mr|mrs|sec|n|nr|no)"
+    r"|\b[A-ZÀ-Ý])\.$",
+    re.I,
+)
+# "- item", "* item", "• item", "1. item", "a) item"
+_BULLET_RE = re.compile(r"^\s*(?:[-*•–]|\d+[.)]|[a-z]\))\s+")
+MIN_WORDS = 3
+
+
+def _split_prose(text: str) -> List[str]:
+    out: List[str] = []
+    for part in _SENT_RE.split(" ".join(text.split())):
+        if out and _ABBREV_RE.search(out[-1]):
+            out[-1] = f"{out[-1]} {part}"
+        else:
+            out.append(part)
+    return [p for p in out if len(p.split()) >= MIN_WORDS]
+
+
+def _is_heading(line: str) -> bool:
+    """Short line without sentence punctuation, e.g. "ORARI DI APERTURA (dal 22/09/2025)"."""
+    return len(line.split()) <= 12 and not re.search(r"[.!?;:][\"”»')\]]*$", line)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Answerable units of a room text: sentences of prose, and list items kept
+    whole (with the heading of their section) however short they are, since
+    "- Lunedì–Venerdì: 09:00–13:00" is an answer on its own.
+    """
+    out: List[str] = []
+    heading = ""
+    prose: List[str] = []
+    item = None
+
+    def flush():
+        nonlocal item
+        if prose:
+            out.extend(_split_prose(" ".join(prose)))
+            prose.clear()
+        if item is not None:
+            out.append(f"{heading}: {item}" if heading else item)
+            item = None
+
+    for raw in (text or "").splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            flush()
+            continue
+        if _BULLET_RE.match(raw):
+            flush()
+            item = _BULLET_RE.sub("", raw).strip()
+        elif item is not None and raw[:1].isspace():
+            # Indented continuation of the previous item
+            item = f"{item} {line}"
+        elif not prose and _is_heading(line):
+            flush()
+            heading = line
+        else:
+            if item is not None:
+                flush()
+            prose.append(line)
+    flush()
+    return out
+
+
+def room_sentences(room_data: dict) -> List[dict]:
+    """One record per distinct sentence: room_id, lang, text, in room and text order."""
+    out = []
+    for rid, room in room_data.items():
+        for lang in ("it", "en"):
+            seen = set()
+            for sent in split_sentences(room.get(f"text_{lang}", "")):
+                if sent not in seen:
+                    seen.add(sent)
+                    out.append({"room_id": rid, "lang": lang, "text": sent})
+    return out
+
+
+def pick_sentences(
+    sims: np.ndarray,
+    rows: np.ndarray,
+    langs: List[str],
+    lang: str,
+    max_sentences: int = 3,
+    margin: float = 0.05,
+) -> Tuple[List[int], float]:
+    """
+    Choose sentence rows for an answer from one room's candidates.
+
+    Sentences in the answer language win when there are any; after the best
+    one, up to max_sentences-1 more are added if they score within `margin`.
+    Returns (rows in text order, best similarity).
+    """
+    if len(rows) == 0:
+        return [], 0.0
+    same = np.array([langs[r] == lang for r in rows])
+    if same.any():
+        rows, sims = rows[same], sims[same]
+    order = np.argsort(-sims)
+    best = float(sims[order[0]])
+    chosen = [int(rows[i]) for i in order[:max_sentences] if sims[i] >= best - margin]
+    return sorted(chosen), best
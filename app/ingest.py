@@ -1,75 +1,361 @@
 #!/usr/bin/env python3
 import os
+import sys
 import csv
-import pickle
+import time
+import argparse
 
 import numpy as np
-import faiss
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
-load_dotenv()
-
 # Base directory = repository root (one level above app/)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+# Allow both `python app/ingest.py` and `python -m app.ingest`
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.ann_index import (  # noqa: E402
+    EMBED_DTYPE,
+    EMBEDDINGS_NAME,
+    INDEX_TYPE,
+    INDEX_TYPES,
+    apply_search_params,
+    build_index,
+    index_nbytes,
+    write_index,
+)
+from app.chunker import make_token_counter, model_max_tokens, size_report, split_aligned  # noqa: E402
+from app.dedup import dedup_records  # noqa: E402
+from app.meta_store import META_DB_NAME, write_store  # noqa: E402
+from app.quantize import EMBED_DTYPES, agreement_report  # noqa: E402
+from app.translate import TRANSLATIONS_NAME, translate_records  # noqa: E402
+
+load_dotenv()
+
 DATA_DIR  = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
 INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(BASE_DIR, "index"))
 MODEL     = os.getenv("EMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
 
-os.makedirs(INDEX_DIR, exist_ok=True)
+# Passage chunking: 0 = the embedding model's max sequence length minus its
+# special tokens; larger values are capped to that
+ENABLE_CHUNKER       = os.getenv("ENABLE_CHUNKER", "1") == "1"
+CHUNK_MAX_TOKENS     = int(os.getenv("CHUNK_MAX_TOKENS", "0"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+
+# Exact / near-duplicate passages: dropped within a room, reported across rooms
+ENABLE_DEDUP    = os.getenv("ENABLE_DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+# Rows without text_en: IT -> EN through the local Ollama, cached per text_it hash
+ENABLE_TRANSLATE      = os.getenv("ENABLE_TRANSLATE", "1") == "1"
+TRANSLATE_MODEL       = os.getenv("TRANSLATE_MODEL", os.getenv("LLM_MODEL", "qwen2.5:7b-instruct-q4_0"))
+OLLAMA_URL            = os.getenv("OLLAMA_URL", "http://localhost:11434")
+TRANSLATE_BATCH_ROWS  = int(os.getenv("TRANSLATE_BATCH_ROWS", "8"))
+TRANSLATE_BATCH_CHARS = int(os.getenv("TRANSLATE_BATCH_CHARS", "6000"))
+TRANSLATE_WORKERS     = int(os.getenv("TRANSLATE_WORKERS", "2"))
+TRANSLATE_MAX_CTX     = int(os.getenv("TRANSLATE_MAX_CTX", "8192"))   # num_ctx ceiling per request
 
 chunks_csv = os.path.join(DATA_DIR, "chunks.csv")
-meta_out   = os.path.join(INDEX_DIR, "meta.pkl")
-index_out  = os.path.join(INDEX_DIR, "faiss.index")
-
-records, texts = [], []
-
-with open(chunks_csv, encoding="utf-8-sig", newline="") as f:
-    r = csv.DictReader(f)
-    for row_idx, row in enumerate(r, start=1):
-        # Try to read Italian text from either "text_it" or generic "text"
-        text_it = (row.get("text_it") or row.get("text") or "").strip()
-        if not text_it:
-            print(f"Row {row_idx}: empty Italian text, skipping")
-            continue
+meta_out   = os.path.join(INDEX_DIR, META_DB_NAME)
+emb_out    = os.path.join(INDEX_DIR, EMBEDDINGS_NAME)
+dedup_out  = os.path.join(INDEX_DIR, "dedup_report.csv")
+translations_out = os.path.join(INDEX_DIR, TRANSLATIONS_NAME)
+
+
+def read_chunks_csv(path: str) -> list:
+    """Read curated rows from chunks.csv into chunk records."""
+    records = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        r = csv.DictReader(f)
+        for row_idx, row in enumerate(r, start=1):
+            # Try to read Italian text from either "text_it" or generic "text"
+            text_it = (row.get("text_it") or row.get("text") or "").strip()
+            if not text_it:
+                print(f"Row {row_idx}: empty Italian text, skipping")
+                continue
+
+            # No length filter here: long rows are split by the chunker stage
+
+            rec = {
+                "chunk_id": (row.get("chunk_id") or f"chunk_{row_idx}").strip(),
+                "scope_type": (row.get("scope_type") or "room").strip(),
+                "scope_id": (row.get("scope_id") or "").strip(),
+                "url": (row.get("url") or "").strip(),
+                "heading": (row.get("heading") or "").strip(),
+                "text_it": text_it,
+            }
 
-        # NO length filter anymore – we trust your CSV
-        # print(f"Row {row_idx}: loaded {len(text_it)} chars")
+            text_en = (row.get("text_en") or "").strip()
+            if text_en:
+                rec["text_en"] = text_en
 
-        rec = {
-            "chunk_id": (row.get("chunk_id") or f"chunk_{row_idx}").strip(),
-            "scope_type": (row.get("scope_type") or "room").strip(),
-            "scope_id": (row.get("scope_id") or "").strip(),
-            "url": (row.get("url") or "").strip(),
-            "heading": (row.get("heading") or "").strip(),
-            "text_it": text_it,
-        }
+            records.append(rec)
+    return records
 
-        text_en = (row.get("text_en") or "").strip()
-        if text_en:
-            rec["text_en"] = text_en
 
-        records.append(rec)
-        texts.append(text_it)
+def chunk_records(records: list, model: SentenceTransformer) -> list:
+    """
+    Split every row into token-bounded IT/EN passages.
 
-print(f"Loaded {len(records)} chunks")
+    Passages keep the row's scope and heading; chunk_id becomes
+    "<parent>#<n>" when a row is split, with the parent in parent_chunk_id.
+    curated_en marks every passage of a row that came with English, so the
+    translator leaves them alone even if a passage got no English sentence.
+    """
+    limit = model_max_tokens(model)
+    max_tokens = min(CHUNK_MAX_TOKENS, limit) if CHUNK_MAX_TOKENS else limit
+    count_tokens = make_token_counter(model)
 
-if not texts:
-    raise RuntimeError(
-        "No valid chunks read from chunks.csv.\n"
-        "Check that the file has a 'text_it' or 'text' column with non-empty content."
+    passages = []
+    sizes_before, sizes_after = [], []
+    for rec in records:
+        sizes_before.append(count_tokens(rec["text_it"]))
+        parts = split_aligned(
+            rec["text_it"],
+            rec.get("text_en", ""),
+            max_tokens=max_tokens,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            count_tokens=count_tokens,
+        )
+        for n, ((text_it, ovl_it), (text_en, ovl_en)) in enumerate(parts):
+            p = dict(rec)
+            p["chunk_id"] = rec["chunk_id"] if len(parts) == 1 else f"{rec['chunk_id']}#{n + 1}"
+            p["parent_chunk_id"] = rec["chunk_id"]
+            p["passage_no"] = n
+            p["text_it"] = text_it
+            p["overlap_it"] = ovl_it
+            p["text_en"] = text_en
+            p["overlap_en"] = ovl_en
+            p["curated_en"] = bool(rec.get("text_en"))
+            if not text_en:
+                p.pop("text_en", None)
+                p.pop("text_en_source", None)
+            passages.append(p)
+            sizes_after.append(count_tokens(text_it))
+
+    print(f"Chunker: max_tokens={max_tokens} overlap={CHUNK_OVERLAP_TOKENS} "
+          f"→ {len(records)} rows became {len(passages)} passages")
+    print(size_report("  before", sizes_before, max_tokens))
+    print(size_report("  after ", sizes_after, max_tokens))
+    return passages
+
+
+def build(index_type: str = INDEX_TYPE, dtype: str = EMBED_DTYPE):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+
+    records = read_chunks_csv(chunks_csv)
+    print(f"Loaded {len(records)} chunks")
+
+    if not records:
+        raise RuntimeError(
+            "No valid chunks read from chunks.csv.\n"
+            "Check that the file has a 'text_it' or 'text' column with non-empty content."
+        )
+
+    model = SentenceTransformer(MODEL)
+
+    if ENABLE_CHUNKER:
+        records = chunk_records(records, model)
+    if ENABLE_DEDUP:
+        records = dedup_records(records, DEDUP_THRESHOLD, report_path=dedup_out)
+    # After the chunker: token-bounded passages fit the translation context
+    translated = translate(records) if ENABLE_TRANSLATE else 0
+
+    texts = [rec["text_it"] for rec in records]
+    emb = model.encode(texts, normalize_embeddings=True, batch_size=64, show_progress_bar=True)
+    emb = np.asarray(emb, dtype=np.float32)
+
+    t0 = time.perf_counter()
+    index, params = build_index(emb, index_type, dtype=dtype)
+    print(f"Built {index_type} index {params} in {time.perf_counter() - t0:.1f}s "
+          f"({index_nbytes(index) / 1e6:.1f} MB)")
+
+    index_out = write_index(INDEX_DIR, index, index_type, params)
+    # Raw float32 vectors are kept for `bench` / `quant` and for rebuilding
+    # with another index type or dtype
+    np.save(emb_out, emb)
+    write_store(
+        meta_out,
+        records,
+        info={"embed_model": MODEL, "dim": emb.shape[1], "embed_dtype": dtype, "machine_translated_rows": translated},
     )
 
-model = SentenceTransformer(MODEL)
-emb = model.encode(texts, normalize_embeddings=True, batch_size=64, show_progress_bar=True)
-emb = np.asarray(emb, dtype=np.float32)
+    print(f"Wrote index → {index_out}\nWrote meta → {meta_out}")
+
+
+def translate(records: list) -> int:
+    """Fill missing text_en in place (batched, resumable); returns machine-translated passages."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    return translate_records(
+        records,
+        translations_out,
+        OLLAMA_URL,
+        TRANSLATE_MODEL,
+        batch_rows=TRANSLATE_BATCH_ROWS,
+        batch_chars=TRANSLATE_BATCH_CHARS,
+        workers=TRANSLATE_WORKERS,
+        max_ctx=TRANSLATE_MAX_CTX,
+    )
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def load_bench_queries(emb: np.ndarray, n_queries: int, queries_file: str):
+    """Real questions from a file, or a sample of corpus vectors. Returns (queries, description)."""
+    if queries_file:
+        with open(queries_file, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        model = SentenceTransformer(MODEL)
+        queries = np.asarray(model.encode(questions, normalize_embeddings=True), dtype=np.float32)
+        return queries, f"{len(questions)} questions from {queries_file}"
+    rng = np.random.default_rng(0)
+    picks = rng.choice(emb.shape[0], size=min(n_queries, emb.shape[0]), replace=False)
+    return emb[picks], f"{len(picks)} corpus vectors"
+
+
+def bench(
+    types: list,
+    k: int,
+    n_queries: int,
+    queries_file: str,
+    ef_search: list,
+    nprobe: list,
+    dtype: str = EMBED_DTYPE,
+):
+    """
+    Compare index types on the vectors of the current index.
+
+    Ground truth is the exact flat index. For each type (and each efSearch /
+    nprobe value) we report recall@k, single-query latency and index size.
+    """
+    if not os.path.exists(emb_out):
+        raise RuntimeError(f"{emb_out} not found; run ingest first.")
+    emb = np.load(emb_out).astype(np.float32)
+    n = emb.shape[0]
+
+    queries, source = load_bench_queries(emb, n_queries, queries_file)
+
+    k = min(k, n)
+    print(f"Benchmark: n={n} dim={emb.shape[1]} k={k} dtype={dtype} queries={source}")
+
+    flat, _ = build_index(emb, "flat", dtype="float32")
+    _, gt = flat.search(queries, k)
+
+    print(f"{'type':<7} {'param':<16} {'recall@' + str(k):>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'size MB':>8} {'build s':>8}")
+    for index_type in types:
+        t0 = time.perf_counter()
+        try:
+            index, params = build_index(emb, index_type, dtype=dtype)
+        except ValueError as e:
+            print(f"{index_type:<7} skipped: {e}")
+            continue
+        build_s = time.perf_counter() - t0
+        size_mb = index_nbytes(index) / 1e6
+
+        if index_type == "hnsw":
+            sweep = [("ef_search", v) for v in ef_search]
+        elif index_type in ("ivf", "ivfpq"):
+            sweep = [("nprobe", v) for v in nprobe if v <= params["nlist"]] or [("nprobe", params["nlist"])]
+        else:
+            sweep = [(None, None)]
+
+        for name, value in sweep:
+            if name:
+                apply_search_params(index, index_type, {**params, name: value})
+            lat = []
+            hits = 0
+            for qi in range(queries.shape[0]):
+                t = time.perf_counter()
+                _, ids = index.search(queries[qi : qi + 1], k)
+                lat.append((time.perf_counter() - t) * 1000)
+                hits += len(set(ids[0].tolist()) & set(gt[qi].tolist()))
+            recall = hits / (k * queries.shape[0])
+            label = f"{name}={value}" if name else "-"
+            print(f"{index_type:<7} {label:<16} {recall:>9.3f} {np.percentile(lat, 50):>8.3f} "
+                  f"{np.percentile(lat, 95):>8.3f} {size_mb:>8.1f} {build_s:>8.1f}")
+
+
+def quant(k: int, n_queries: int, queries_file: str):
+    """Ranking agreement and memory of float16 / int8 storage versus float32."""
+    if not os.path.exists(emb_out):
+        raise RuntimeError(f"{emb_out} not found; run ingest first.")
+    emb = np.load(emb_out).astype(np.float32)
+    queries, source = load_bench_queries(emb, n_queries, queries_file)
+    k = min(k, emb.shape[0])
+    print(f"Embedding storage: n={emb.shape[0]} dim={emb.shape[1]} k={k} queries={source}")
+    print(f"{'dtype':<8} {'MB':>8} {'saved':>6} {'top-1':>6} {'recall@' + str(k):>9} {'max err':>8}")
+    rows = agreement_report(emb, queries, k)
+    ref_bytes = rows[0]["bytes"]
+    for r in rows:
+        print(f"{r['dtype']:<8} {r['bytes'] / 1e6:>8.2f} {1 - r['bytes'] / ref_bytes:>6.0%} "
+              f"{r['top1_agreement']:>6.3f} {r[f'recall@{k}']:>9.3f} {r['max_abs_score_err']:>8.4f}")
+
+
+def dedup_report(threshold: float):
+    """Duplicate report on the current chunks.csv without rebuilding the index."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    records = read_chunks_csv(chunks_csv)
+    if ENABLE_CHUNKER:
+        records = chunk_records(records, SentenceTransformer(MODEL))
+    dedup_records(records, threshold, report_path=dedup_out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the museum index from data/chunks.csv.")
+    sub = parser.add_subparsers(dest="cmd")
+
+    p_build = sub.add_parser("build", help="build faiss.index and meta.sqlite (default)")
+    p_build.add_argument("--index-type", default=INDEX_TYPE, choices=INDEX_TYPES)
+    p_build.add_argument("--dtype", default=EMBED_DTYPE, choices=EMBED_DTYPES, help="vector storage in the index")
+
+    p_bench = sub.add_parser("bench", help="recall/latency/size of index types on the current vectors")
+    p_bench.add_argument("--types", default=",".join(INDEX_TYPES), help="comma-separated index types")
+    p_bench.add_argument("--k", type=int, default=10)
+    p_bench.add_argument("--queries", type=int, default=500, help="corpus vectors sampled as queries")
+    p_bench.add_argument("--queries-file", default="", help="text file with one real question per line")
+    p_bench.add_argument("--ef-search", type=_int_list, default=[16, 32, 64, 128])
+    p_bench.add_argument("--nprobe", type=_int_list, default=[1, 4, 16, 64])
+    p_bench.add_argument("--dtype", default=EMBED_DTYPE, choices=EMBED_DTYPES)
+
+    p_quant = sub.add_parser("quant", help="ranking agreement and memory of float16/int8 vs float32 vectors")
+    p_quant.add_argument("--k", type=int, default=10)
+    p_quant.add_argument("--queries", type=int, default=500, help="corpus vectors sampled as queries")
+    p_quant.add_argument("--queries-file", default="", help="text file with one real question per line")
+
+    p_dedup = sub.add_parser("dedup", help="report duplicate passages within and across rooms, without building")
+    p_dedup.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="MinHash/Jaccard similarity")
+
+    sub.add_parser("translate", help="translate passages without text_en into the cache, without building")
 
-index = faiss.IndexFlatIP(emb.shape[1])  # cosine via normalized vectors
-index.add(emb)
+    args = parser.parse_args()
+    if args.cmd == "translate":
+        records = read_chunks_csv(chunks_csv)
+        if ENABLE_CHUNKER:
+            records = chunk_records(records, SentenceTransformer(MODEL))
+        n = translate(records)
+        print(f"{n} of {len(records)} passages have a machine translation")
+    elif args.cmd == "dedup":
+        dedup_report(args.threshold)
+    elif args.cmd == "bench":
+        bench(
+            [t.strip() for t in args.types.split(",") if t.strip()],
+            args.k,
+            args.queries,
+            args.queries_file,
+            args.ef_search,
+            args.nprobe,
+            args.dtype,
+        )
+    elif args.cmd == "quant":
+        quant(args.k, args.queries, args.queries_file)
+    else:
+        build(getattr(args, "index_type", INDEX_TYPE), getattr(args, "dtype", EMBED_DTYPE))
 
-faiss.write_index(index, index_out)
-with open(meta_out, "wb") as f:
-    pickle.dump({"records": records}, f)
 
-print(f"Wrote index → {index_out}\nWrote meta → {meta_out}")
+if __name__ == "__main__":
+    main()
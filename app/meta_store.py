@@ -0,0 +1,183 @@
+"""
+Chunk metadata store shared by ingest and the server.
+
+Ingest writes one SQLite file (meta.sqlite) next to faiss.index. Each row of
+the `chunks` table is one chunk record; `row_id` is the row of the same chunk
+in faiss.index. The server and the router trainer stream the room chunks once
+(indexed on `scope_type`) to build their per-room aggregates, so the corpus is
+never held in memory chunk by chunk. The `info` table records how the index
+was built, for inspection with the sqlite3 shell.
+
+The file is opened read-only and each process / thread gets its own
+connection, so any number of uvicorn workers can read it at the same time.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional
+
+META_DB_NAME = "meta.sqlite"
+LEGACY_META_NAME = "meta.pkl"
+
+# Columns of a chunk record and their defaults, in table order (row_id comes first).
+# Passages cut by the ingest chunker keep their source row in parent_chunk_id;
+# overlap_it / overlap_en are the number of leading characters repeated from
+# the previous passage of the same parent. text_en_source is "curated" or
+# "machine" (translated at ingest, see app/translate.py) when text_en is set.
+CHUNK_DEFAULTS = {
+    "chunk_id": "",
+    "scope_type": "room",
+    "scope_id": "",
+    "url": "",
+    "heading": "",
+    "text_it": "",
+    "text_en": "",
+    "parent_chunk_id": "",
+    "passage_no": 0,
+    "overlap_it": 0,
+    "overlap_en": 0,
+    "text_en_source": "",
+}
+CHUNK_FIELDS = tuple(CHUNK_DEFAULTS)
+
+SCHEMA = """
+CREATE TABLE chunks (
+    row_id     INTEGER PRIMARY KEY,
+    chunk_id   TEXT NOT NULL,
+    scope_type TEXT NOT NULL DEFAULT 'room',
+    scope_id   TEXT NOT NULL DEFAULT '',
+    url        TEXT NOT NULL DEFAULT '',
+    heading    TEXT NOT NULL DEFAULT '',
+    text_it    TEXT NOT NULL,
+    text_en    TEXT NOT NULL DEFAULT '',
+    parent_chunk_id TEXT NOT NULL DEFAULT '',
+    passage_no INTEGER NOT NULL DEFAULT 0,
+    overlap_it INTEGER NOT NULL DEFAULT 0,
+    overlap_en INTEGER NOT NULL DEFAULT 0,
+    text_en_source TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX idx_chunks_scope ON chunks(scope_type, scope_id);
+CREATE TABLE info (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _record_row(row_id: int, rec: dict) -> tuple:
+    values = {k: (rec.get(k) or default) for k, default in CHUNK_DEFAULTS.items()}
+    # Unsplit rows are their own parent
+    values["parent_chunk_id"] = values["parent_chunk_id"] or values["chunk_id"]
+    return (row_id, *values.values())
+
+
+def write_store(path: str, records: List[dict], info: Optional[Dict[str, str]] = None) -> None:
+    """
+    Write all chunk records to a fresh SQLite file at `path`.
+
+    Record i gets row_id i, i.e. the same position it has in faiss.index.
+    The file is built under a temporary name and moved into place at the end,
+    so a running server never sees a half-written store.
+    """
+    out_dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".meta-", suffix=".sqlite", dir=out_dir)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                f"INSERT INTO chunks (row_id, {', '.join(CHUNK_FIELDS)}) "
+                f"VALUES (?, {', '.join('?' for _ in CHUNK_FIELDS)})",
+                (_record_row(i, rec) for i, rec in enumerate(records)),
+            )
+            if info:
+                conn.executemany(
+                    "INSERT INTO info (key, value) VALUES (?, ?)",
+                    [(k, str(v)) for k, v in info.items()],
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _row_to_record(row: sqlite3.Row) -> dict:
+    # Stores written before a column existed get its default
+    columns = row.keys()
+    rec = {k: row[k] if k in columns else CHUNK_DEFAULTS[k] for k in CHUNK_FIELDS}
+    rec["row_id"] = row["row_id"]
+    if not rec["text_en"]:
+        # Same shape as the old meta.pkl: text_en only present when curated
+        del rec["text_en"]
+    return rec
+
+
+def passage_body(rec: dict, lang: str = "it") -> str:
+    """Passage text without the overlap repeated from the previous passage."""
+    text = rec.get(f"text_{lang}") or ""
+    return text[int(rec.get(f"overlap_{lang}") or 0) :].strip()
+
+
+class MetaStore:
+    """Read-only access to meta.sqlite."""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, re-opened after fork (uvicorn workers)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            uri = "file:" + os.path.abspath(self.path).replace("\\", "/") + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only = 1")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def iter_chunks(self, scope_type: Optional[str] = None) -> Iterator[dict]:
+        """Stream chunk records in row order without materialising the corpus."""
+        if scope_type is None:
+            cur = self._conn().execute("SELECT * FROM chunks ORDER BY row_id")
+        else:
+            cur = self._conn().execute(
+                "SELECT * FROM chunks WHERE scope_type = ? ORDER BY row_id",
+                (scope_type,),
+            )
+        for row in cur:
+            yield _row_to_record(row)
+
+
+def migrate_legacy_pickle(index_dir: str) -> str:
+    """Convert an old meta.pkl into meta.sqlite (same directory) and return its path."""
+    pkl_path = os.path.join(index_dir, LEGACY_META_NAME)
+    db_path = os.path.join(index_dir, META_DB_NAME)
+    with open(pkl_path, "rb") as f:
+        records = pickle.load(f)["records"]
+    write_store(db_path, records)
+    return db_path
+
+
+def open_store(index_dir: str) -> MetaStore:
+    """
+    Open meta.sqlite in `index_dir`.
+
+    Indexes built before the SQLite store only have meta.pkl; those are
+    converted once on first open so old index folders keep working.
+    """
+    db_path = os.path.join(index_dir, META_DB_NAME)
+    if not os.path.exists(db_path) and os.path.exists(os.path.join(index_dir, LEGACY_META_NAME)):
+        print(f"[META] {LEGACY_META_NAME} found without {META_DB_NAME}, converting once.")
+        migrate_legacy_pickle(index_dir)
+    return MetaStore(db_path)
@@ -0,0 +1,345 @@
+"""
+Per-museum profiles: practical visitor info, classifier room descriptions,
+name and contacts used in prompts and fallback messages.
+
+The foundation runs more than one museum from the same server. The built-in
+profile below is the Museo delle Genti d'Abruzzo; other museums put a
+museum.json next to their index (see load_profile) with at least their own
+visitor info and email, so they never answer with GDA's hours or contacts.
+"""
+import json
+import os
+from typing import Iterable, Optional
+
+PROFILE_NAME = "museum.json"
+# What another museum's museum.json must set: without them it would answer
+# logistics questions and fallbacks with nothing (or someone else's data)
+TENANT_REQUIRED_KEYS = ("info_it", "info_en", "email")
+
+
+class ProfileError(ValueError):
+    pass
+
+
+# Synthetic room id for general museum information (hours, tickets, contacts...)
+INFO_ROOM_ID = "GDA-Info-Museo"
+
+
+MUSEUM_INFO_IT = """
+Museo delle Genti d’Abruzzo – Informazioni per la visita
+
+INDIRIZZO
+- Museo delle Genti d’Abruzzo
+  Via delle Caserme 24, 65127 Pescara (PE), Italia
+- Telefono centralino: +39 085 451 0026
+- Email generale: museo@gentidabruzzo.it
+- Email didattica / scuole: didattica@gentidabruzzo.it
+
+ORARI DI APERTURA (Museo delle Genti d’Abruzzo – dal 22/09/2025)
+- Lunedì–Venerdì: 09:00–13:00
+- Sabato–Domenica: 16:00–20:00
+- Chiusure: 1 gennaio, Pasqua, 1 novembre, 25 e 26 dicembre.
+(L’orario può variare: per sicurezza controlla sempre il sito ufficiale.)
+
+MUSEO BASILIO CASCELLA (stessa fondazione)
+- Lunedì–Giovedì: 09:00–13:00 (solo su prenotazione entro 3 giorni)
+- Venerdì: 09:00–13:00
+- Sabato–Domenica: 16:00–20:00
+- Prenotazioni: +39 085 451 0026 int. 1 – museo@gentidabruzzo.it / info@museocascella.it
+- Chiusure festive come il Museo delle Genti d’Abruzzo.
+
+ORARI NEGOZIO / BOOKSHOP
+- Aperto negli stessi orari del museo.
+- Aperture straordinarie su richiesta per piccoli gruppi (min. 6 persone, prenotazione almeno 48 ore prima).
+
+ORARI BIBLIOTECA (servizi bibliotecari e sala lettura)
+- Lunedì: 09:00–13:00 e 15:30–18:30
+- Martedì: 09:00–13:00
+- Mercoledì: 15:30–18:30
+- Giovedì: 15:30–20:30 (dalle 18:30 solo sala lettura)
+- Venerdì: 09:00–13:00
+- Info e prenotazioni: tel. +39 085 451 1562 (int. 5) – biblioteca@gentidabruzzo.it
+
+BIGLIETTI – MUSEO DELLE GENTI D’ABRUZZO
+- Intero adulti: 8 €
+- Ridotto over 65: 5 €
+- Ridotto under 18: 5 €
+
+BIGLIETTO CUMULATIVO (Museo delle Genti d’Abruzzo + Museo Civico “B. Cascella”)
+- Intero adulti: 12 €
+- Ridotto (under 18 e over 65): 8 €
+
+INGRESSO GRATUITO
+- Bambini fino a 3 anni
+- Persone con disabilità
+- Soci ASTRA – Amici del Museo delle Genti d’Abruzzo
+- Soci Archeoclub
+- Soci ICOM
+- Donatori AVIS e FIDAS (gratuità per la mostra permanente sul Risorgimento in Abruzzo)
+
+RIDUZIONI (esempi principali)
+- Convenzioni: Abruzzo B&B, FAI, dipendenti Questura di Pescara, dipendenti Amministrazione Penitenziaria
+- Studenti universitari
+- Soci VIVIPARCHI
+- Gruppi (almeno 15 persone)
+- Soci Touring Club: sconto 50%
+- Card Consorzio Turistico Montesilvano
+(Le condizioni possono cambiare: per dettagli aggiornati vedere la sezione “Tariffe e Informazioni” del sito.)
+
+COME ARRIVARE
+- Indirizzo: Via delle Caserme 24, Pescara.
+- Autobus urbani: linee 3, 10, 21, 38 (fermate in zona Porta Nuova).
+- Treno: stazione Pescara Porta Nuova a breve distanza.
+- Auto: possibilità di parcheggio nei pressi del museo (vedi mappa collegata sul sito).
+- Mobilità sostenibile: disponibilità di monopattini in sharing (es. Helbiz) nella zona.
+
+SERVIZI AL PUBBLICO
+- Ristorante / Caffè Letterario: pranzi, cene, catering, banchetti.
+- Biblioteca: supporto alla ricerca sul territorio abruzzese; consultazione aperta a tutti su prenotazione.
+- Punto vendita: pubblicazioni del museo, libri per bambini, cartoline, gadget, giochi, cancelleria, accessori e altro.
+- Visite guidate per gruppi su prenotazione (contattare il museo per info su costi e lingue disponibili).
+- Accessibilità: informazioni specifiche nella sezione “Accessibilità” del sito.
+
+MOSTRE ED EVENTI
+- Mostre temporanee e iniziative culturali sono elencate e aggiornate nelle sezioni “Mostre” ed “Eventi” del sito gentidabruzzo.com.
+- Per laboratori didattici, attività per scuole, famiglie e adulti, consultare la sezione “Servizi educativi”.
+
+NOTE
+- Le tariffe, gli orari e le convenzioni possono subire modifiche. In caso di dubbio, fai sempre riferimento alle informazioni più recenti pubblicate sul sito ufficiale del museo.
+- si puo fare video e foto nel museo
+"""
+
+MUSEUM_INFO_EN = """
+Genti d’Abruzzo Museum – Visitor information
+
+ADDRESS
+- Genti d’Abruzzo Museum
+  Via delle Caserme 24, 65127 Pescara (PE), Italy
+- Main phone: +39 085 451 0026
+- General email: museo@gentidabruzzo.it
+- Education / schools: didattica@gentidabruzzo.it
+
+OPENING HOURS (Genti d’Abruzzo Museum – from 22 Sept 2025)
+- Monday–Friday: 09:00–13:00
+- Saturday–Sunday: 16:00–20:00
+- Closed on: 1 January, Easter Sunday, 1 November, 25 and 26 December.
+(Times may change; always check the official website before your visit.)
+
+BASILIO CASCELLA MUSEUM (same foundation)
+- Monday–Thursday: 09:00–13:00 (only by reservation at least 3 days in advance)
+- Friday: 09:00–13:00
+- Saturday–Sunday: 16:00–20:00
+- Bookings: +39 085 451 0026 ext. 1 – museo@gentidabruzzo.it / info@museocascella.it
+- Closed on the same main holidays as Genti d’Abruzzo.
+
+SHOP / BOOKSHOP
+- Open during museum hours.
+- Special openings for small groups on request (minimum 6 people, booking at least 48 hours in advance).
+
+LIBRARY HOURS
+- Monday: 09:00–13:00 and 15:30–18:30
+- Tuesday: 09:00–13:00
+- Wednesday: 15:30–18:30
+- Thursday: 15:30–20:30 (reading room only after 18:30)
+- Friday: 09:00–13:00
+- Info and bookings: +39 085 451 1562 (ext. 5) – biblioteca@gentidabruzzo.it
+
+TICKETS – GENTI D’ABRUZZO MUSEUM
+- Adult: 8 €
+- Reduced 65+: 5 €
+- Reduced under 18: 5 €
+
+COMBINED TICKET (Genti d’Abruzzo Museum + “B. Cascella” Civic Museum)
+- Adult: 12 €
+- Reduced (under 18 and over 65): 8 €
+
+FREE ADMISSION
+- Children up to 3 years
+- Visitors with disabilities
+- Members of: ASTRA – Friends of the Genti d’Abruzzo Museum, Archeoclub, ICOM
+- AVIS and FIDAS blood donors (free entry to the permanent exhibition on the Risorgimento in Abruzzo)
+
+DISCOUNTS (main examples)
+- Partner rates for: Abruzzo B&B, FAI, staff of Pescara Police HQ, staff of the Prison Administration
+- University students
+- VIVIPARCHI members
+- Groups of at least 15 people
+- Touring Club members: 50% discount
+- Card holders of Consorzio Turistico Montesilvano
+(Conditions and partners may change; for exact current rules see the “Tariffe e Informazioni” page.)
+
+HOW TO GET THERE
+- Address: Via delle Caserme 24, Pescara.
+- City buses: lines 3, 10, 21, 38 (stops around Porta Nuova).
+- Train: Pescara Porta Nuova station within walking distance.
+- Car: parking available in the streets near the museum (see linked map on the website).
+- Sustainable mobility: electric scooters in sharing (e.g. Helbiz) are usually available in the area.
+
+VISITOR SERVICES
+- Restaurant / Literary Café: lunches, dinners, catering and banquets.
+- Library: research-oriented library on Abruzzo history and culture, open to the public by reservation.
+- Bookshop: museum publications, children’s books, postcards, gadgets, stationery, board games, accessories and more.
+- Guided tours for groups available on reservation (contact the museum for prices and available languages).
+- Accessibility information is provided in the “Accessibilità / Accessibility” section of the website.
+
+EXHIBITIONS AND EVENTS
+- Temporary exhibitions and cultural events are listed and regularly updated in the “Mostre” (Exhibitions) and “Eventi” (Events) sections at gentidabruzzo.com.
+- Educational activities and workshops for schools, families and adults are described under “Servizi educativi”.
+
+NOTES
+- Opening hours, prices and discounts can change. When in doubt, rely on the latest information published on the museum’s official website.
+"""
+
+
+# -------------------------------------------------------------
+# Custom per-room descriptions for the classifier
+# (keys MUST match scope_id values in chunks.csv)
+# -------------------------------------------------------------
+
+CUSTOM_ROOM_DESCRIPTIONS = {
+
+    "GDA-Sala-1": (
+        "Chronological overview of Abruzzo prehistory and protohistory, from the earliest Homo erectus and Neanderthals to the arrival of Homo sapiens, the Mesolithic crisis, the Neolithic agricultural revolution, and the later Copper, Bronze, and Iron Ages in the region. This room is ONLY about very ancient periods before the Roman Empire and before medieval or modern peasants: early humans, stone tools, the first Neolithic farmers and herders, the development of metallurgy, and the emergence of Italic peoples before and during Roman conquest.",
+        "Contains information on Paleolithic hunting, Mesolithic small-game strategies, Neolithic crops such as wheat, barley, and farro, the invention of impressed pottery, the building of the first huts and villages, and the spread of metal weapons and tools among warrior societies. Use this room for ANY question about the diet or daily life of Paleolithic, Mesolithic, Neolithic, Bronze Age or Iron Age people, Italic tribes, the Social War, or the collapse of Roman order after barbarian invasions – NOT the later contadini or 19th–20th century farmers."
+    ),
+
+    "GDA-Sala-2": (
+        "Thematic room dedicated to the sacred use of caves in Abruzzo, showing how natural grottoes became places of worship, ritual pits, and stone circles linked to the cult of Mother Earth from the Neolithic onward. It explains the difference between caves as sanctuaries for offerings and prayers versus open-air villages for everyday life, emphasizing religious practices rather than ordinary dwelling, farming, or domestic routines.",
+        "Includes the Grotta dei Piccioni with ritual deposits and child sacrifices, ex-votos in ceramic, stone, and bone, and the long continuity of pagan rites adapted into Christian worship by hermit monks and saints such as Saint Michael the Archangel. It focuses on cave sanctuaries, healing practices connected to rock and water, and modern pilgrimages to eremi and grottoes where pre-Christian traditions survive under Christian forms, unlike the broader landscape view in the Galleria del Territorio."
+    ),
+
+    "GDA-Sala-3": (
+        "Explores the continuity of objects, symbols, and rituals from prehistoric times to the twentieth century, showing how certain forms and motifs survive almost unchanged in Abruzzese popular culture. The focus is on long-term links between ancient amulets, protective devices, and decorative patterns and their later rural and Christian counterparts, rather than on a single period or one specific craft like textiles or ceramics.",
+        "Displays everyday tools such as ricottiere, lucerne, fusi, and trapani a volano, alongside magical-ritual objects like ciprea shells, cornetti, arrowhead pendants, and mask-like faces on buildings that echo ancient anti-evil symbols. The room also presents festivals with prehistoric roots, including solstice fires, carnival figures, agrarian fertility rites like the ballo della pupa, and Easter pastries shaped as hearts, dolls, and horses, complementing but not duplicating the detailed textile work of GDA-Sala-11 or marriage jewelry of GDA-Sala-12."
+    ),
+
+    "GDA-Sala-4": (
+        "Room dedicated to the clothing, equipment, and everyday world of Abruzzo shepherds, showing how they dressed, defended themselves, and crafted their own tools in a self-sufficient economy. It emphasizes sheepskin jackets, leather leggings, chiochie sandals, and the use of staffs, slings, umbrellas, and bags designed for a hard outdoor life on the move with flocks, rather than the architecture of stone huts or the legal aspects of transhumance.",
+        "Includes objects that highlight the shepherd as artisan and warrior, such as the mazza chiodata for defense, the mazzafionne sling inherited from ancient Italic slingers, carved wooden furniture and gifts, musical instruments like zampogna and ciaramella, and the crucial role of the Pastore Abruzzese-Maremmano dog with its spiked collar. The room underlines how pastoral work, pauses during grazing, and isolation produced a strong craft tradition and a heroic, story-telling culture among shepherds, distinct from the hut reconstructions of GDA-Sala-5 and GDA-Sala-6."
+    ),
+
+    "GDA-Sala-5": (
+        "Presents the stone pastoral huts known as tholos and the broader world of transhumant shepherding in Abruzzo, focusing on how seasonal movements shaped settlements and economic life. It explains why shepherds needed dry-stone shelters in high mountains, how these were built without mortar, and how the abundance of stone and the practice of monticazione favored this architecture, as opposed to the domestic rural houses shown in GDA-Sala-10.",
+        "Displays models and photographs of tholos villages on the Maiella and Gran Sasso, documents about the ancient and early-modern sheep economy, and maps of tratturi used for long-distance migrations between Abruzzo and Puglia. It also includes images of key tasks such as washing, branding, and shearing sheep, contracts and travel permits issued by the Bourbon state, and counting devices and registers used to manage large flocks and pay shepherds, complementing but not repeating the interior life-size hut of GDA-Sala-6."
+    ),
+
+    "GDA-Sala-6": (
+        "Contains a life-size reconstruction of a stone tholos hut and shows how a shepherd actually lived inside, with minimal furniture and tools arranged for survival in harsh mountain conditions. The architecture demonstrates how corbelled stones form a self-supporting dome without wood or mortar, solving the problem of roofing in a landscape where timber is scarce but stone is abundant, going into more physical detail than the models and photos of GDA-Sala-5.",
+        "The room also presents the arciclocco storage pole with hanging cauldrons and friscelle for cheese-making, highlighting the production of pecorino and other dairy foods as essential to pastoral life. Panels explain how centuries of such existence forged key Abruzzese traits such as frugality, toughness, solidarity, and low criminality, and describe the stazzo, a mobile fence enclosure used to protect the flock at night and moved with the shepherd during transhumance or monticazione; questions about shepherd character and identity rather than routes or contracts belong here."
+    ),
+
+    "GDA-Galleria-Armi-Guerrieri": (
+        "Large gallery tracing the evolution of weapons, armor, and warriors from the Copper Age through the Bronze and Iron Ages to the Roman period and the early Middle Ages, with a special focus on Abruzzo finds. It connects archaeological objects with the broader history of warfare, showing how new metals, tactics, and social structures changed the way conflicts were fought, rather than focusing on peaceful rural life or domestic crafts.",
+        "Displays blades, spearheads, helmets, shields, and circular bronze cuirasses typical of Italic warriors, along with the reconstructed grave 302 from the necropolis of Fossa and the full panoply of a Longobard fighter. The exhibition explains hoplite tactics, the rise of organized city-state armies, the professionalization of the Roman legion, and includes didactic areas where students can wear replica helmets, armor, and belts to experience ancient military equipment, complementing the more general prehistory of GDA-Sala-1."
+    ),
+
+    "GDA-Sala-7": (
+        "Room devoted to traditional cereal agriculture and the annual grain cycle in HISTORICAL rural Abruzzo (mainly early modern to 20th century), from plowing and sowing to harvesting, threshing, winnowing, and storage. It shows how techniques and tools for working wheat remained stable in the world of contadini and sharecroppers, but it is NOT about Paleolithic or Neolithic farmers or prehistoric food – those belong to GDA-Sala-1.",
+        "The central model and displays present animal-drawn aratri and erpici, hand sowing a spaglio, sickles and protective finger thimbles, correggiati for threshing, and wooden forks and shovels used for winnowing grain in the wind, along with measures for cereals and tools to protect and store harvests. Use this room for questions about the work, tools and environment of historic peasants and 18th–20th century agricultural life (harvest methods, scarecrows, field huts, measures, rural cereal economy), NOT for questions about prehistoric or Neolithic diets or the very first farmers."
+    ),
+
+    "GDA-Sala-8": (
+        "Thematic room split into two sectors: traditional transport systems and olive cultivation with oil production, both central to Abruzzo rural life beyond cereal farming. It explains how goods, water, firewood, and crops were moved by human carriers, pack animals, sleds, and carts over steep and often poorly maintained roads, as well as how olives were harvested and processed, without dealing in depth with wine or pork production (which belong to GDA-Sala-9).",
+        "Displays photographs and reconstructions of women carrying loads on the head with a spare cloth ring, mules equipped with decorated basti, wooden sleds for steep slopes, and parts of painted wagons. In the agricultural section it illustrates the olive harvest in November, cleaning and bagging of fruit, and the functioning of the frantoio with stone mill, press, fiscoli, and hearth, describing oil as cooking fat, lamp fuel, and medicinal remedy, together with tools and practices for mowing, drying, and storing hay in barns or outdoor haystacks."
+    ),
+
+    "GDA-Sala-9": (
+        "Room that continues the story of rural food production by focusing on viticulture, winemaking, and pig husbandry as pillars of domestic self-sufficiency in Abruzzo. It presents the historical development from pre-Roman wine culture through predominantly home-consumption vineyards to modern DOC labels like Montepulciano d'Abruzzo, Cerasuolo, Trebbiano, and Controguerra, clearly separate from olive-oil production (GDA-Sala-8) and grain agriculture (GDA-Sala-7).",
+        "The displays show grape harvest in baskets, pressing in stone or wooden vats called mese, traditional and mechanical presses, fermentation into novello wine, and storage in oak barrels for aging. The second half of the room is dedicated to the slaughter and complete use of the pig, including hanging carcasses, sausage machines, preserved cuts, and a variety of conservation methods such as salting, smoking, oil and vinegar packing, along with mortars and containers used for sauces, spices, jams, lard, blood puddings, and preserved tomatoes."
+    ),
+
+    "GDA-Sala-10": (
+        "Room focused on rural housing and domestic life, analyzing how Abruzzo homes were built and organized in mountain, hill, and coastal zones, and how architecture reflected economic conditions. It contrasts stone houses often embedded in rock, earth-and-straw dwellings, and brick or tuff constructions, and then moves inside to examine the division of work spaces and living quarters, rather than pastoral huts (GDA-Sala-5 and GDA-Sala-6) or prisons (GDA-Ceti-Urbani_Risorgimento).",
+        "Exhibits the lower level spaces such as stables, barns, cellars, and storerooms, and the upper domestic areas centered on the kitchen with fireplace, bread oven, and simple furniture like tables, benches, and the madia for flour and bread. The room highlights children's toys fashioned from cheap or recycled materials, describes the heavy domestic workload of women including water-carrying and washing, and shows beds with straw or wool mattresses, chests for trousseaux, cradles, and terracotta or metal oil lamps that illuminated the house at night."
+    ),
+
+    "GDA-Sala-11": (
+        "Explores the complete production cycle of textile fibers, especially linen and wool, in a context where spinning and weaving were mainly domestic and female tasks aimed at family self-sufficiency. It follows the process from field to finished fabric, explaining sowing, harvesting, seed extraction, retting in water, drying, breaking, and combing the fibers before spinning, focusing on techniques rather than on the social rituals of clothing at weddings (GDA-Sala-12).",
+        "Displays tools such as the wooden trocche for breaking stems, the ràscele combs, distaff and spindle, and later the small spinning wheel known as felarelle, as well as looms commissioned from carpenters and used in many households. The room also presents simple and patterned linens for sheets, towels, and tablecloths, discusses the flourishing wool craft tradition of mountain centers like Sulmona, Scanno, and Taranta Peligna, and shows blankets and carpets called tarante decorated with geometric and symbolic motifs such as flower vases, trees of life, animals, and stylized human figures."
+    ),
+
+    "GDA-Sala-12": (
+        "Room dedicated to the life-cycle moment of marriage and the way clothing, dowries, and jewelry expressed social status, gender roles, and values in traditional Abruzzo society. It follows the sequence from courtship and family agreements through the formal promise, exchange of gifts, and preparation of the bride's corredo to the celebration and transfer to the groom's house, focusing on costumes and ornaments rather than on everyday textile production techniques (GDA-Sala-11).",
+        "Exhibits wedding and festive costumes, including dark or pastel dresses, traditional rural outfits, head coverings signaling whether a woman is single, married, or widowed, and the rare red eighteenth-century gown from Scanno. The room also focuses on jewelry and amulets such as filigree cannatora necklaces, presentosa pendants with hearts, sciacquajje earrings, children's protective charms and noisy contromalucchie, and a variety of silver buttons, buckles, pins, and multifunctional accessories that combine beauty, symbolism, and magical protection."
+    ),
+
+    "GDA-Sala-13": (
+        "Room entirely devoted to Abruzzese maiolica and related ceramics, tracing their development from medieval times through the Renaissance, Baroque, and modern periods, and highlighting Abruzzo as one of the most important production areas in Western Europe. It explains what maiolica is, with its tin-glazed surface and painted decoration, and contrasts it with ingobbiata, invetriata, and graffita wares popular in the fifteenth century, focusing on ceramic art rather than on metalwork, textiles, or jewelry.",
+        "Shows luxury tableware, pharmacy jars, flower vases, shaving basins, devotional plaques, architectural elements like the famous San Donato ceiling from Castelli, and floor tiles and kitchen linings. It also presents the specialized ceramic towns such as Castelli, Anversa degli Abruzzi, Tagliacozzo, and Torre de' Passeri, then follows the eighteenth- and nineteenth-century decline toward cheaper, popular wares like simple bowls, pitchers, and scaldamani, as markets for aristocratic and export ceramics contracted."
+    ),
+
+    "GDA-Galleria-Territorio": (
+        "Panoramic gallery presenting Abruzzo as a 'museum in the open air', emphasizing its variety of landscapes from Adriatic coast to high Apennine peaks, the high proportion of land in national and regional parks, and its exceptional biodiversity. It shows how centuries of relative isolation preserved traditional environments, farming systems, and settlement patterns more than in many other Italian regions, giving a territorial overview instead of focusing on one craft or social group.",
+        "Panels and images highlight historic villages and town centers of ancient origin, the great artisanal traditions in ceramics, metalwork, textiles, and wood, and the special spiritual landscape of eremi and monasteries that shaped Abruzzese mentality. The gallery also explores the dense network of castles and fortified sites, explains how conserved original contexts reduce the need for museums, and reflects on the advantages and challenges of treating the whole region as a territory-museum where heritage remains embedded in its authentic surroundings."
+    ),
+
+    "GDA-Ceti-Urbani_Risorgimento": (
+        "Section devoted to the Borbonic prison in Pescara and the rise of modern urban bourgeois society in Abruzzo during the eighteenth and nineteenth centuries, especially in the context of the Risorgimento. It recounts how many young Abruzzese revolutionaries and members of the educated middle classes were chained and incarcerated here between 1850 and 1860 for political crimes linked to demands for Italian unity, constitution, and civil rights, unlike the rural or prehistoric focus of most other rooms.",
+        "Provides quantitative data on the bagno penale, the age and social background of the one hundred political prisoners, and the contrast between urban bourgeois modernizers and largely rural masses resistant to change. The displays also examine bourgeois cultural spaces such as palatial houses, salotti, cafés, and theaters where public opinion, secret societies like the Carboneria, and the idea of press freedom were formed, illustrating a shift from feudal structures to a mass society shaped by industrialization and global communication."
+    ),
+    "GDA-Info-Museo": (
+        "Sala dedicata alle informazioni pratiche sul Museo delle Genti d'Abruzzo e sul Museo Basilio Cascella: orari di apertura, prezzi dei biglietti, riduzioni e ingressi gratuiti, come arrivare, contatti, orari della biblioteca e del bookshop, servizi al pubblico e note su mostre ed eventi.",
+        "Room dedicated to practical information about the Genti d'Abruzzo Museum and the Basilio Cascella Museum: opening hours, ticket prices, discounts and free admission, how to get there, contact details, library and bookshop hours, visitor services, and notes on exhibitions and events."
+    ),
+
+}
+
+
+# Built-in profile (Museo delle Genti d'Abruzzo)
+DEFAULT_PROFILE = {
+    "name_it": "Museo delle Genti d'Abruzzo",
+    "name_en": "Genti d'Abruzzo museum",
+    "email": "museo@gentidabruzzo.it",
+    "phone": "+39 085 451 0026",
+    "info_room_id": INFO_ROOM_ID,
+    "info_heading": "Informazioni Museo / Museum info",
+    "info_it": MUSEUM_INFO_IT,
+    "info_en": MUSEUM_INFO_EN,
+    "room_descriptions": CUSTOM_ROOM_DESCRIPTIONS,
+}
+
+# Base for other museums of the foundation: nothing of GDA's. Their
+# museum.json must set TENANT_REQUIRED_KEYS and should set name and phone.
+GENERIC_PROFILE = {
+    "name_it": "museo",
+    "name_en": "museum",
+    "email": "",
+    "phone": "",
+    "info_room_id": "Info-Museo",
+    "info_heading": "Informazioni Museo / Museum info",
+    "info_it": "",
+    "info_en": "",
+    "room_descriptions": {},
+}
+
+
+def load_profile(index_dir: str, base: Optional[dict] = None, required: Iterable[str] = ()) -> dict:
+    """
+    Profile for the museum whose index lives in `index_dir`.
+
+    Keys in <index_dir>/museum.json override the base profile (the built-in
+    one by default). "info_it" / "info_en" may also be given as file names
+    relative to index_dir, e.g. "info_it": "info_it.txt". Raises ProfileError
+    if any `required` key is missing or empty afterwards.
+    """
+    profile = dict(base if base is not None else DEFAULT_PROFILE)
+    path = os.path.join(index_dir, PROFILE_NAME)
+    if not os.path.exists(path):
+        return _check_required(profile, path, required)
+
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    for key in ("info_it", "info_en"):
+        value = overrides.get(key)
+        if isinstance(value, str) and value.endswith(".txt"):
+            with open(os.path.join(index_dir, value), encoding="utf-8") as f:
+                overrides[key] = f.read()
+    profile.update(overrides)
+    return _check_required(profile, path, required)
+
+
+def _check_required(profile: dict, path: str, required: Iterable[str]) -> dict:
+    missing = [k for k in required if not str(profile.get(k) or "").strip()]
+    if missing:
+        raise ProfileError(f"{path} must set {', '.join(missing)}")
+    return profile
@@ -0,0 +1,150 @@
+"""
+On-demand sampling profiler for the running server.
+
+A session is started from the admin endpoint for the next N /ask requests or
+T seconds. While it runs, a background thread takes a snapshot of every
+thread's Python stack (sys._current_frames) every interval_ms and counts
+identical stacks. Idle threads (pool workers waiting for work, the event loop
+waiting on its selector) are skipped, so the counts show where requests
+actually spend their time: embedding, pydantic validation, the Ollama round
+trip, logging, ...
+
+The report is in the "folded" format understood by flamegraph.pl, speedscope
+and inferno: one line per stack, frames joined by ";" root first, then a
+space and the sample count.
+
+When no session is active nothing is sampled; the request path only checks
+one attribute.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Innermost frames that mean "this thread is waiting for work, not serving"
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.active = False
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.requests_seen = 0
+        self.max_requests = 0
+        self.deadline = 0.0
+        self.interval_s = 0.005
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, requests: int = 0, seconds: float = 0.0, interval_ms: float = 5.0) -> dict:
+        """Begin a session that ends after `requests` /ask calls or `seconds`, whichever comes first."""
+        if not requests and not seconds:
+            raise ValueError("pass requests and/or seconds")
+        with self._lock:
+            if self.active:
+                raise RuntimeError("a profiling session is already running")
+            self.stacks = Counter()
+            self.samples = 0
+            self.requests_seen = 0
+            self.max_requests = int(requests)
+            self.started_at = time.monotonic()
+            self.finished_at = 0.0
+            self.deadline = self.started_at + seconds if seconds else 0.0
+            self.interval_s = max(interval_ms, 1.0) / 1000
+            self.active = True
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        print(f"[PROFILE] started: requests={requests} seconds={seconds} interval={interval_ms}ms")
+        return self.status()
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self.active:
+                return
+            self.active = False
+            self.finished_at = time.monotonic()
+        print(f"[PROFILE] finished: {self.samples} samples over {self.requests_seen} requests")
+
+    def request_done(self) -> None:
+        """Called at the end of every /ask while a session is active."""
+        with self._lock:
+            self.requests_seen += 1
+            done = self.max_requests and self.requests_seen >= self.max_requests
+        if done:
+            self.stop()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while self.active:
+            if self.deadline and time.monotonic() >= self.deadline:
+                self.stop()
+                break
+            tick = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                tick.append(";".join(reversed(stack)))
+            # Readers iterate over a copy taken under the same lock
+            with self._lock:
+                self.stacks.update(tick)
+                self.samples += len(tick)
+            time.sleep(self.interval_s)
+
+    def status(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        return {
+            "active": self.active,
+            "samples": self.samples,
+            "requests_seen": self.requests_seen,
+            "max_requests": self.max_requests,
+            "elapsed_s": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "interval_ms": round(self.interval_s * 1000, 1),
+        }
+
+    def _snapshot(self) -> tuple:
+        with self._lock:
+            return Counter(self.stacks), self.samples
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frame;frame;frame count" line each."""
+        stacks, _ = self._snapshot()
+        return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+    def top_functions(self, limit: int = 25) -> list:
+        """Functions by share of samples they appear in (inclusive) and are on top of (self)."""
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        stacks, samples = self._snapshot()
+        for stack, n in stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += n
+            for f in set(frames):
+                inclusive[f] += n
+        total = max(samples, 1)
+        return [
+            {"function": f, "inclusive": round(n / total, 4), "self": round(own[f] / total, 4)}
+            for f, n in inclusive.most_common(limit)
+        ]
@@ -0,0 +1,109 @@
+"""
+Compact storage for normalized embedding vectors.
+
+- float32  reference, 4 bytes per dimension
+- float16  half precision, 2 bytes per dimension, practically lossless for
+           cosine scores of normalized vectors
+- int8     symmetric scalar quantization with one float32 scale per vector
+           (x ≈ scale * codes, codes in [-127, 127]), 1 byte per dimension
+
+Scores are (codes @ q) * scale. numpy has no BLAS kernel for float16 or
+int8, so the product converts the codes to float32 block by block
+(SCORE_BLOCK_ROWS rows at a time): only compact codes are read from memory and
+no full-size float32 copy is made, but the conversion is CPU work. int8 scores
+about as fast as float32; float16 is several times slower and is a memory
+saving, not a speed-up.
+"""
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+EMBED_DTYPES = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 1024  # float32 temporary of ~1.5 MB at 384 dims, stays in cache
+
+
+def quantize(emb: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Return (codes, scales); scales is None except for int8."""
+    emb = np.asarray(emb, dtype=np.float32)
+    if dtype == "float32":
+        return emb, None
+    if dtype == "float16":
+        return emb.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(emb).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(emb / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown embedding dtype {dtype!r}, expected one of {', '.join(EMBED_DTYPES)}")
+
+
+def scores(codes: np.ndarray, scales: Optional[np.ndarray], q: np.ndarray) -> np.ndarray:
+    """Inner products of every stored vector with one float32 query vector."""
+    q = np.asarray(q, dtype=np.float32)
+    if codes.dtype == np.float32:
+        sims = codes @ q
+    else:
+        sims = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+            block = codes[start : start + SCORE_BLOCK_ROWS]
+            sims[start : start + SCORE_BLOCK_ROWS] = block.astype(np.float32) @ q
+    return sims * scales if scales is not None else sims
+
+
+def save_embeddings(path: str, codes: np.ndarray, scales: Optional[np.ndarray]) -> None:
+    """
+    codes in <path> (.npy) and, for int8, scales in <path>.scales.npy next to it.
+
+    Each file is written under a temporary name and renamed, scales first: once
+    the codes file exists the pair is complete, so concurrent readers (other
+    workers) never load a half-written cache.
+    """
+    for arr, target in ((scales, _scales_path(path)), (codes, path)):
+        if arr is None:
+            continue
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, target)
+
+
+def load_embeddings(path: str, mmap: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    mode = "r" if mmap else None
+    codes = np.load(path, mmap_mode=mode)
+    scales_path = _scales_path(path)
+    scales = np.load(scales_path, mmap_mode=mode) if codes.dtype == np.int8 and os.path.exists(scales_path) else None
+    return codes, scales
+
+
+def _scales_path(path: str) -> str:
+    return path[: -len(".npy")] + ".scales.npy" if path.endswith(".npy") else path + ".scales.npy"
+
+
+def agreement_report(emb: np.ndarray, queries: np.ndarray, k: int = 10) -> list:
+    """
+    For each storage dtype: bytes used, top-1 agreement and recall@k of the
+    ranking against float32, and the largest absolute score error.
+    """
+    emb = np.asarray(emb, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, emb.shape[0])
+    ref = queries @ emb.T
+    ref_top = np.argsort(-ref, axis=1)[:, :k]
+
+    rows = []
+    for dtype in EMBED_DTYPES:
+        codes, scales = quantize(emb, dtype)
+        approx = np.stack([scores(codes, scales, q) for q in queries]).astype(np.float32)
+        top = np.argsort(-approx, axis=1)[:, :k]
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)])
+        rows.append(
+            {
+                "dtype": dtype,
+                "bytes": int(codes.nbytes + (scales.nbytes if scales is not None else 0)),
+                "top1_agreement": float(np.mean(ref_top[:, 0] == top[:, 0])),
+                f"recall@{k}": float(overlap),
+                "max_abs_score_err": float(np.abs(approx - ref).max()),
+            }
+        )
+    return rows
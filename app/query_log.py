@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Structured query log: one JSON line per /ask, gzip-compressed and rotated.
+
+The request path only does a non-blocking put on an in-memory queue; a
+background thread owns the file. When the queue is full the record is
+dropped and counted, never waited for.
+
+Every record carries the original request body and the tenant-scoped path it
+was served on, so a log file can be replayed against a server as-is:
+
+    python app/query_log.py replay logs/queries-*.jsonl.gz --url http://127.0.0.1:8000
+    python app/query_log.py slow logs/queries-*.jsonl.gz --top 20
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+_STOP = object()
+
+
+class QueryLogger:
+    def __init__(
+        self,
+        log_dir: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        rotate_s: float = 24 * 3600,
+        queue_size: int = 10000,
+        flush_s: float = 2.0,
+    ):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.rotate_s = rotate_s
+        self.flush_s = flush_s
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._file: Optional[gzip.GzipFile] = None
+        self._file_bytes = 0
+        self._file_opened = 0.0
+        self.current_path = ""
+        os.makedirs(log_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def log(self, record: dict) -> None:
+        """Queue a record; never blocks the caller."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "file": self.current_path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+    # --- writer thread ---------------------------------------------------
+
+    def _open(self) -> None:
+        # pid in the name: every uvicorn worker writes its own file
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.current_path = os.path.join(self.log_dir, f"queries-{stamp}-{os.getpid()}.jsonl.gz")
+        self._file = gzip.open(self.current_path, "ab")
+        self._file_bytes = 0
+        self._file_opened = time.monotonic()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_s)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._close_file()
+                return
+
+            if item is not None:
+                try:
+                    if self._file is None or self._file_bytes >= self.max_bytes or (
+                        time.monotonic() - self._file_opened >= self.rotate_s
+                    ):
+                        self._close_file()
+                        self._open()
+                    line = (json.dumps(item, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                    self._file.write(line)
+                    self._file_bytes += len(line)
+                    self.written += 1
+                except Exception as e:
+                    print(f"[QLOG] ERROR writing record: {e}")
+
+            # Sync-flush so a crash loses at most flush_s of records and the
+            # file stays readable while it is still open
+            if self._file is not None and time.monotonic() - last_flush >= self.flush_s:
+                self._file.flush()
+                last_flush = time.monotonic()
+
+
+def iter_records(paths: List[str]) -> Iterator[dict]:
+    """Yield records from log files (globs allowed); tolerates a truncated last line."""
+    files: List[str] = []
+    for p in paths:
+        files.extend(sorted(glob.glob(p)) or [p])
+    for path in files:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except EOFError:
+            # File still being written (no gzip trailer yet)
+            continue
+
+
+def replay(paths: List[str], url: str, concurrency: int, limit: int) -> None:
+    """Send logged requests back to a server and compare latencies."""
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    records = [r for r in iter_records(paths) if r.get("request") and r.get("path")]
+    if limit:
+        records = records[:limit]
+    print(f"Replaying {len(records)} requests against {url} with concurrency {concurrency}")
+
+    session = requests.Session()
+
+    def send(rec: dict):
+        t0 = time.perf_counter()
+        try:
+            resp = session.post(url.rstrip("/") + rec["path"], json=rec["request"], timeout=600)
+            status = resp.status_code
+            body = resp.json() if resp.ok else {}
+        except Exception as e:
+            status, body = f"error: {e}", {}
+        ms = (time.perf_counter() - t0) * 1000
+        return rec, status, ms, body
+
+    changed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, records))
+    for rec, status, ms, body in results:
+        same = body.get("answer") == rec.get("answer")
+        changed += 0 if same else 1
+        print(f"{status} {ms:8.0f} ms (logged {rec.get('total_ms', 0):8.0f} ms) "
+              f"{'same' if same else 'DIFF'}  {rec.get('question', '')[:70]!r}")
+    lat = sorted(ms for _, _, ms, _ in results)
+    if lat:
+        print(f"p50={lat[len(lat) // 2]:.0f} ms p95={lat[min(len(lat) - 1, int(len(lat) * 0.95))]:.0f} ms "
+              f"answers changed: {changed}/{len(results)}")
+
+
+def slowest(paths: List[str], top: int) -> None:
+    records = sorted(iter_records(paths), key=lambda r: r.get("total_ms", 0), reverse=True)[:top]
+    for r in records:
+        stages = " ".join(f"{k}={v:.0f}" for k, v in (r.get("stages_ms") or {}).items())
+        print(f"{r.get('total_ms', 0):8.0f} ms  {r.get('museum')}/{r.get('room_id')}  "
+              f"{r.get('question', '')[:60]!r}  [{stages}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or analyse the structured query log.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_replay = sub.add_parser("replay", help="send logged requests to a server")
+    p_replay.add_argument("paths", nargs="+")
+    p_replay.add_argument("--url", default="http://127.0.0.1:8000")
+    p_replay.add_argument("--concurrency", type=int, default=1)
+    p_replay.add_argument("--limit", type=int, default=0)
+
+    p_slow = sub.add_parser("slow", help="list the slowest logged questions with stage timings")
+    p_slow.add_argument("paths", nargs="+")
+    p_slow.add_argument("--top", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.cmd == "replay":
+        replay(args.paths, args.url, args.concurrency, args.limit)
+    else:
+        slowest(args.paths, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Learned room router: a calibrated softmax (multinomial logistic regression)
+head on top of the sentence-embedding vectors the server already computes.
+
+It replaces a full 7B generation for picking one of ~17 rooms with a matrix
+product. Training lives in app/train_router.py; the fitted weights are saved
+as router.npz next to the tenant's index and loaded by the server.
+"""
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROUTER_NAME = "router.npz"
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class RoomRouter:
+    def __init__(self, W: np.ndarray, b: np.ndarray, labels: List[str], temperature: float = 1.0, embed_model: str = ""):
+        self.W = np.asarray(W, dtype=np.float32)
+        self.b = np.asarray(b, dtype=np.float32)
+        self.labels = list(labels)
+        self.temperature = float(temperature)
+        self.embed_model = embed_model
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated class probabilities for a batch of normalized embeddings."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        return _softmax((X @ self.W + self.b) / self.temperature)
+
+    def rank(self, q_emb: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (room_id, probability) for one query embedding."""
+        p = self.predict_proba(q_emb)[0]
+        order = np.argsort(-p)[:top_k]
+        return [(self.labels[i], float(p[i])) for i in order]
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            W=self.W,
+            b=self.b,
+            labels=np.array(self.labels),
+            temperature=np.array(self.temperature),
+            embed_model=np.array(self.embed_model),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RoomRouter":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                z["W"],
+                z["b"],
+                [str(x) for x in z["labels"]],
+                float(z["temperature"]),
+                str(z["embed_model"]),
+            )
+
+
+def fit_softmax(
+    X: np.ndarray,
+    y: np.ndarray,
+    n_classes: int,
+    l2: float = 1e-3,
+    epochs: int = 400,
+    lr: float = 0.05,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Full-batch Adam on the class-balanced cross-entropy with L2 on W.
+
+    The data sets here are a few thousand rows at most, so this converges in
+    well under a second and keeps scikit-learn out of the dependencies.
+    """
+    rng = np.random.default_rng(seed)
+    n, d = X.shape
+    W = (rng.standard_normal((d, n_classes)) * 0.01).astype(np.float64)
+    b = np.zeros(n_classes, dtype=np.float64)
+    Y = np.eye(n_classes)[y]
+
+    # Balance classes so synthetic-heavy rooms do not dominate
+    counts = np.bincount(y, minlength=n_classes).astype(np.float64)
+    sw = (n / (n_classes * np.maximum(counts, 1)))[y][:, None]
+
+    m = [np.zeros_like(W), np.zeros_like(b)]
+    v = [np.zeros_like(W), np.zeros_like(b)]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    for t in range(1, epochs + 1):
+        P = _softmax(X @ W + b)
+        G = (P - Y) * sw / n
+        grads = [X.T @ G + l2 * W, G.sum(axis=0)]
+        for i, (param, g) in enumerate(zip((W, b), grads)):
+            m[i] = beta1 * m[i] + (1 - beta1) * g
+            v[i] = beta2 * v[i] + (1 - beta2) * g * g
+            m_hat = m[i] / (1 - beta1 ** t)
+            v_hat = v[i] / (1 - beta2 ** t)
+            param -= lr * m_hat / (np.sqrt(v_hat) + eps)
+    return W.astype(np.float32), b.astype(np.float32)
+
+
+def fit_temperature(logits: np.ndarray, y: np.ndarray) -> float:
+    """Temperature scaling: the T minimising held-out negative log-likelihood."""
+    best_t, best_nll = 1.0, np.inf
+    for t in np.logspace(-1.5, 1.0, 60):
+        p = _softmax(logits / t)
+        nll = -np.mean(np.log(p[np.arange(len(y)), y] + 1e-12))
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def expected_calibration_error(p: np.ndarray, y: np.ndarray, bins: int = 10) -> float:
+    conf = p.max(axis=1)
+    correct = (p.argmax(axis=1) == y).astype(np.float64)
+    ece = 0.0
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (conf > lo) & (conf <= hi)
+        if mask.any():
+            ece += mask.mean() * abs(conf[mask].mean() - correct[mask].mean())
+    return float(ece)
+
+
+def load_router(index_dir: str, room_ids: List[str], embed_model: str = "") -> Optional[RoomRouter]:
+    """
+    Load router.npz from a tenant's index folder, or None if there is none or
+    it no longer matches the rooms / embedding model being served.
+    """
+    path = os.path.join(index_dir, ROUTER_NAME)
+    if not os.path.exists(path):
+        return None
+    router = RoomRouter.load(path)
+    unknown = [rid for rid in router.labels if rid not in room_ids]
+    if unknown:
+        print(f"[ROUTER] {path} has rooms not in the index ({', '.join(unknown[:3])}...), ignoring it.")
+        return None
+    if embed_model and router.embed_model and router.embed_model != embed_model:
+        print(f"[ROUTER] {path} was trained on {router.embed_model}, server uses {embed_model}; ignoring it.")
+        return None
+    return router
@@ -1,17 +1,36 @@
+import hashlib
+import hmac
 import os
-import pickle
 import re
-from collections import defaultdict
-from typing import List, Optional
+import sys
+import time
+import threading
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+import contextvars
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import numpy as np
 import requests
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from requests.adapters import HTTPAdapter
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+from app.answer_pack import load_pack
+from app.embed_sidecar import RemoteEmbedder
+from app.extractive import pick_sentences, room_sentences
+from app.meta_store import open_store, passage_body
+from app.museum_profiles import DEFAULT_PROFILE, GENERIC_PROFILE, TENANT_REQUIRED_KEYS, ProfileError, load_profile
+from app.profiler import SamplingProfiler
+from app.quantize import EMBED_DTYPES, load_embeddings, quantize, save_embeddings, scores
+from app.static_files import PrecompressedStaticFiles, compress_dir
+from app.query_log import QueryLogger
+from app.room_router import load_router
+
 load_dotenv()
 
 # -------------------------------------------------------------
@@ -35,6 +54,87 @@ OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 ENABLE_CRITIC = os.getenv("ENABLE_CRITIC", "0") == "1"
 CRITIC_MODEL = os.getenv("CRITIC_MODEL", LLM_MODEL)
 
+# Learned room router (router.npz from app/train_router.py): answers with
+# calibrated probability >= ROUTER_MIN_CONF skip the LLM classifier, the rest
+# escalate to it over the router's top rooms
+ROUTER_MIN_CONF = float(os.getenv("ROUTER_MIN_CONF", "0.80"))
+ROUTER_DEGRADED_MIN_CONF = float(os.getenv("ROUTER_DEGRADED_MIN_CONF", "0.40"))
+ROUTER_ESCALATE_TOP_K = int(os.getenv("ROUTER_ESCALATE_TOP_K", "5"))
+
+# Multi-museum tenancy: the default museum uses INDEX_DIR, every other museum
+# has its own index folder TENANTS_DIR/<museum>/ (faiss.index, meta.sqlite,
+# museum.json) and is served under /t/<museum>/... or with an X-Museum header.
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "gda")
+TENANTS_DIR = os.getenv("TENANTS_DIR", "./tenants")
+TENANT_MEM_BUDGET_MB = int(os.getenv("TENANT_MEM_BUDGET_MB", "1024"))
+PRELOAD_TENANTS = [t.strip() for t in os.getenv("PRELOAD_TENANTS", DEFAULT_TENANT).split(",") if t.strip()]
+TENANT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Connections kept open to Ollama, shared by all tenants
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "8"))
+
+# Several uvicorn workers: encode through one embedding sidecar on this Unix
+# socket (app/embed_sidecar.py) instead of a model copy per worker, and map
+# the cached room embeddings read-only so workers share them
+EMBED_SOCKET = os.getenv("EMBED_SOCKET", "")
+MMAP_EMBEDDINGS = os.getenv("MMAP_EMBEDDINGS", "1") == "1"
+# Room embedding storage: float32, float16 or int8 with per-vector scales
+EMBED_DTYPE = os.getenv("EMBED_DTYPE", "float32").lower()
+if EMBED_DTYPE not in EMBED_DTYPES:
+    raise RuntimeError(f"EMBED_DTYPE must be one of {', '.join(EMBED_DTYPES)}, got {EMBED_DTYPE!r}")
+
+# Speculative answers: when the LLM classifier has to pick the room, start
+# answering on the embedding/router top-1 room at the same time and keep that
+# answer if the classifier agrees. Needs Ollama to run two requests at once
+# (OLLAMA_NUM_PARALLEL >= 2); only used at degradation level 0.
+SPECULATIVE_ANSWERS = os.getenv("SPECULATIVE_ANSWERS", "0") == "1"
+
+# Extractive answers (app/extractive.py): the best 1-3 room sentences, no LLM.
+# Used when a request asks for mode="fast", when Ollama fails or times out,
+# and for short history-free questions whose best sentence scores at least
+# EXTRACTIVE_SHORT_MIN_SIM (EXTRACTIVE_SHORT_Q_WORDS=0 disables that path)
+ENABLE_EXTRACTIVE = os.getenv("ENABLE_EXTRACTIVE", "1") == "1"
+EXTRACTIVE_MAX_SENTENCES = int(os.getenv("EXTRACTIVE_MAX_SENTENCES", "3"))
+EXTRACTIVE_MIN_SIM = float(os.getenv("EXTRACTIVE_MIN_SIM", "0.35"))
+EXTRACTIVE_SHORT_Q_WORDS = int(os.getenv("EXTRACTIVE_SHORT_Q_WORDS", "6"))
+EXTRACTIVE_SHORT_MIN_SIM = float(os.getenv("EXTRACTIVE_SHORT_MIN_SIM", "0.75"))
+
+# Structured query log (gzip JSONL, rotated); empty QUERY_LOG_DIR disables it
+QUERY_LOG_DIR = os.getenv("QUERY_LOG_DIR", "./logs")
+QUERY_LOG_MAX_MB = int(os.getenv("QUERY_LOG_MAX_MB", "64"))
+QUERY_LOG_ROTATE_HOURS = float(os.getenv("QUERY_LOG_ROTATE_HOURS", "24"))
+QUERY_LOG_QUEUE = int(os.getenv("QUERY_LOG_QUEUE", "10000"))
+
+# GET /answer: cacheable room-scoped answers (ETag = index content + question)
+ANSWER_MAX_AGE_S = int(os.getenv("ANSWER_MAX_AGE_S", "3600"))
+ANSWER_GET_MAX_CHARS = int(os.getenv("ANSWER_GET_MAX_CHARS", "300"))
+
+# Widget assets: precompressed at startup (.gz, .br with brotli installed)
+# and served with a long Cache-Control
+PRECOMPRESS_STATIC = os.getenv("PRECOMPRESS_STATIC", "1") == "1"
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=86400, stale-while-revalidate=604800")
+
+# /ask/batch: max questions per call and LLM calls running at once per batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Admin endpoints (/admin/...) need this token in X-Admin-Token; empty = disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Per-stage Server-Timing header on /ask answers (visible in browser devtools)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# Load-adaptive degradation: under load we step through cheaper answer modes
+# instead of timing out (see LoadController)
+ENABLE_DEGRADATION = os.getenv("ENABLE_DEGRADATION", "1") == "1"
+DEGRADE_QUEUE_HIGH = int(os.getenv("DEGRADE_QUEUE_HIGH", "6"))        # in-flight /ask requests
+DEGRADE_QUEUE_LOW = int(os.getenv("DEGRADE_QUEUE_LOW", "2"))
+DEGRADE_LATENCY_HIGH_S = float(os.getenv("DEGRADE_LATENCY_HIGH_S", "15"))  # recent p90 latency
+DEGRADE_LATENCY_LOW_S = float(os.getenv("DEGRADE_LATENCY_LOW_S", "6"))
+DEGRADE_WINDOW_S = float(os.getenv("DEGRADE_WINDOW_S", "60"))
+DEGRADE_MIN_DWELL_S = float(os.getenv("DEGRADE_MIN_DWELL_S", "10"))   # min time between level changes
+DEGRADE_CTX_FACTOR = float(os.getenv("DEGRADE_CTX_FACTOR", "0.5"))
+DEGRADED_LLM_MODEL = os.getenv("DEGRADED_LLM_MODEL", "")              # e.g. a smaller quantization
+
 
 # common operational queries we will always answer with a fixed message
 OFFTOPIC_RE = re.compile(
@@ -52,372 +152,517 @@ OFFTOPIC_RE = re.compile(
 
 
 
-# Synthetic room id for general museum information (hours, tickets, contacts...)
-INFO_ROOM_ID = "GDA-Info-Museo"
-
-
-MUSEUM_INFO_IT = """
-Museo delle Genti d’Abruzzo – Informazioni per la visita
-
-INDIRIZZO
-- Museo delle Genti d’Abruzzo
-  Via delle Caserme 24, 65127 Pescara (PE), Italia
-- Telefono centralino: +39 085 451 0026
-- Email generale: museo@gentidabruzzo.it
-- Email didattica / scuole: didattica@gentidabruzzo.it
-
-ORARI DI APERTURA (Museo delle Genti d’Abruzzo – dal 22/09/2025)
-- Lunedì–Venerdì: 09:00–13:00
-- Sabato–Domenica: 16:00–20:00
-- Chiusure: 1 gennaio, Pasqua, 1 novembre, 25 e 26 dicembre.
-(L’orario può variare: per sicurezza controlla sempre il sito ufficiale.)
-
-MUSEO BASILIO CASCELLA (stessa fondazione)
-- Lunedì–Giovedì: 09:00–13:00 (solo su prenotazione entro 3 giorni)
-- Venerdì: 09:00–13:00
-- Sabato–Domenica: 16:00–20:00
-- Prenotazioni: +39 085 451 0026 int. 1 – museo@gentidabruzzo.it / info@museocascella.it
-- Chiusure festive come il Museo delle Genti d’Abruzzo.
-
-ORARI NEGOZIO / BOOKSHOP
-- Aperto negli stessi orari del museo.
-- Aperture straordinarie su richiesta per piccoli gruppi (min. 6 persone, prenotazione almeno 48 ore prima).
-
-ORARI BIBLIOTECA (servizi bibliotecari e sala lettura)
-- Lunedì: 09:00–13:00 e 15:30–18:30
-- Martedì: 09:00–13:00
-- Mercoledì: 15:30–18:30
-- Giovedì: 15:30–20:30 (dalle 18:30 solo sala lettura)
-- Venerdì: 09:00–13:00
-- Info e prenotazioni: tel. +39 085 451 1562 (int. 5) – biblioteca@gentidabruzzo.it
-
-BIGLIETTI – MUSEO DELLE GENTI D’ABRUZZO
-- Intero adulti: 8 €
-- Ridotto over 65: 5 €
-- Ridotto under 18: 5 €
-
-BIGLIETTO CUMULATIVO (Museo delle Genti d’Abruzzo + Museo Civico “B. Cascella”)
-- Intero adulti: 12 €
-- Ridotto (under 18 e over 65): 8 €
-
-INGRESSO GRATUITO
-- Bambini fino a 3 anni
-- Persone con disabilità
-- Soci ASTRA – Amici del Museo delle Genti d’Abruzzo
-- Soci Archeoclub
-- Soci ICOM
-- Donatori AVIS e FIDAS (gratuità per la mostra permanente sul Risorgimento in Abruzzo)
-
-RIDUZIONI (esempi principali)
-- Convenzioni: Abruzzo B&B, FAI, dipendenti Questura di Pescara, dipendenti Amministrazione Penitenziaria
-- Studenti universitari
-- Soci VIVIPARCHI
-- Gruppi (almeno 15 persone)
-- Soci Touring Club: sconto 50%
-- Card Consorzio Turistico Montesilvano
-(Le condizioni possono cambiare: per dettagli aggiornati vedere la sezione “Tariffe e Informazioni” del sito.)
-
-COME ARRIVARE
-- Indirizzo: Via delle Caserme 24, Pescara.
-- Autobus urbani: linee 3, 10, 21, 38 (fermate in zona Porta Nuova).
-- Treno: stazione Pescara Porta Nuova a breve distanza.
-- Auto: possibilità di parcheggio nei pressi del museo (vedi mappa collegata sul sito).
-- Mobilità sostenibile: disponibilità di monopattini in sharing (es. Helbiz) nella zona.
-
-SERVIZI AL PUBBLICO
-- Ristorante / Caffè Letterario: pranzi, cene, catering, banchetti.
-- Biblioteca: supporto alla ricerca sul territorio abruzzese; consultazione aperta a tutti su prenotazione.
-- Punto vendita: pubblicazioni del museo, libri per bambini, cartoline, gadget, giochi, cancelleria, accessori e altro.
-- Visite guidate per gruppi su prenotazione (contattare il museo per info su costi e lingue disponibili).
-- Accessibilità: informazioni specifiche nella sezione “Accessibilità” del sito.
-
-MOSTRE ED EVENTI
-- Mostre temporanee e iniziative culturali sono elencate e aggiornate nelle sezioni “Mostre” ed “Eventi” del sito gentidabruzzo.com.
-- Per laboratori didattici, attività per scuole, famiglie e adulti, consultare la sezione “Servizi educativi”.
-
-NOTE
-- Le tariffe, gli orari e le convenzioni possono subire modifiche. In caso di dubbio, fai sempre riferimento alle informazioni più recenti pubblicate sul sito ufficiale del museo.
-- si puo fare video e foto nel museo
-"""
-
-MUSEUM_INFO_EN = """
-Genti d’Abruzzo Museum – Visitor information
-
-ADDRESS
-- Genti d’Abruzzo Museum
-  Via delle Caserme 24, 65127 Pescara (PE), Italy
-- Main phone: +39 085 451 0026
-- General email: museo@gentidabruzzo.it
-- Education / schools: didattica@gentidabruzzo.it
-
-OPENING HOURS (Genti d’Abruzzo Museum – from 22 Sept 2025)
-- Monday–Friday: 09:00–13:00
-- Saturday–Sunday: 16:00–20:00
-- Closed on: 1 January, Easter Sunday, 1 November, 25 and 26 December.
-(Times may change; always check the official website before your visit.)
-
-BASILIO CASCELLA MUSEUM (same foundation)
-- Monday–Thursday: 09:00–13:00 (only by reservation at least 3 days in advance)
-- Friday: 09:00–13:00
-- Saturday–Sunday: 16:00–20:00
-- Bookings: +39 085 451 0026 ext. 1 – museo@gentidabruzzo.it / info@museocascella.it
-- Closed on the same main holidays as Genti d’Abruzzo.
-
-SHOP / BOOKSHOP
-- Open during museum hours.
-- Special openings for small groups on request (minimum 6 people, booking at least 48 hours in advance).
-
-LIBRARY HOURS
-- Monday: 09:00–13:00 and 15:30–18:30
-- Tuesday: 09:00–13:00
-- Wednesday: 15:30–18:30
-- Thursday: 15:30–20:30 (reading room only after 18:30)
-- Friday: 09:00–13:00
-- Info and bookings: +39 085 451 1562 (ext. 5) – biblioteca@gentidabruzzo.it
-
-TICKETS – GENTI D’ABRUZZO MUSEUM
-- Adult: 8 €
-- Reduced 65+: 5 €
-- Reduced under 18: 5 €
-
-COMBINED TICKET (Genti d’Abruzzo Museum + “B. Cascella” Civic Museum)
-- Adult: 12 €
-- Reduced (under 18 and over 65): 8 €
-
-FREE ADMISSION
-- Children up to 3 years
-- Visitors with disabilities
-- Members of: ASTRA – Friends of the Genti d’Abruzzo Museum, Archeoclub, ICOM
-- AVIS and FIDAS blood donors (free entry to the permanent exhibition on the Risorgimento in Abruzzo)
-
-DISCOUNTS (main examples)
-- Partner rates for: Abruzzo B&B, FAI, staff of Pescara Police HQ, staff of the Prison Administration
-- University students
-- VIVIPARCHI members
-- Groups of at least 15 people
-- Touring Club members: 50% discount
-- Card holders of Consorzio Turistico Montesilvano
-(Conditions and partners may change; for exact current rules see the “Tariffe e Informazioni” page.)
-
-HOW TO GET THERE
-- Address: Via delle Caserme 24, Pescara.
-- City buses: lines 3, 10, 21, 38 (stops around Porta Nuova).
-- Train: Pescara Porta Nuova station within walking distance.
-- Car: parking available in the streets near the museum (see linked map on the website).
-- Sustainable mobility: electric scooters in sharing (e.g. Helbiz) are usually available in the area.
-
-VISITOR SERVICES
-- Restaurant / Literary Café: lunches, dinners, catering and banquets.
-- Library: research-oriented library on Abruzzo history and culture, open to the public by reservation.
-- Bookshop: museum publications, children’s books, postcards, gadgets, stationery, board games, accessories and more.
-- Guided tours for groups available on reservation (contact the museum for prices and available languages).
-- Accessibility information is provided in the “Accessibilità / Accessibility” section of the website.
-
-EXHIBITIONS AND EVENTS
-- Temporary exhibitions and cultural events are listed and regularly updated in the “Mostre” (Exhibitions) and “Eventi” (Events) sections at gentidabruzzo.com.
-- Educational activities and workshops for schools, families and adults are described under “Servizi educativi”.
-
-NOTES
-- Opening hours, prices and discounts can change. When in doubt, rely on the latest information published on the museum’s official website.
-"""
+# -------------------------------------------------------------
+# Shared resources: one embedding model and one Ollama connection pool
+# for every museum served by this process
+# -------------------------------------------------------------
+
+if EMBED_SOCKET:
+    print(f"[EMBED] using embedding sidecar at {EMBED_SOCKET}")
+    embed_model = RemoteEmbedder(EMBED_SOCKET)
+else:
+    from sentence_transformers import SentenceTransformer
+
+    embed_model = SentenceTransformer(EMBED_MODEL)
+
+OLLAMA_SESSION = requests.Session()
+OLLAMA_SESSION.mount(
+    "http://",
+    HTTPAdapter(pool_connections=OLLAMA_POOL_SIZE, pool_maxsize=OLLAMA_POOL_SIZE),
+)
+OLLAMA_SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=OLLAMA_POOL_SIZE, pool_maxsize=OLLAMA_POOL_SIZE),
+)
+
 
 # -------------------------------------------------------------
-# Load room data from meta.pkl and build room-level embeddings
+# Per-request trace and structured query log
 # -------------------------------------------------------------
 
-with open(os.path.join(INDEX_DIR, "meta.pkl"), "rb") as f:
-    META = pickle.load(f)["records"]
-
-embed_model = SentenceTransformer(EMBED_MODEL)
-
-ROOM_IDS: List[str] = []
-ROOM_DATA: dict = {}
-
-agg_it = defaultdict(list)
-agg_en = defaultdict(list)
-room_heading = {}
-room_url = {}
-
-for rec in META:
-    # We only care about room-level records for this architecture
-    if rec.get("scope_type") != "room":
-        continue
-
-    rid = rec["scope_id"]
-    text_it = (rec.get("text_it") or "").strip()
-    text_en = (rec.get("text_en") or "").strip()
-
-    if text_it:
-        agg_it[rid].append(text_it)
-    if text_en:
-        agg_en[rid].append(text_en)
-
-    if rid not in room_heading and rec.get("heading"):
-        room_heading[rid] = rec["heading"]
-    if rid not in room_url and rec.get("url"):
-        room_url[rid] = rec["url"]
-
-ROOM_IDS = sorted(agg_it.keys())
-for rid in ROOM_IDS:
-    ROOM_DATA[rid] = {
-        "room_id": rid,
-        "heading": room_heading.get(rid, f"Room {rid}"),
-        "url": room_url.get(rid, ""),
-        "text_it": " ".join(agg_it[rid]),
-        "text_en": " ".join(agg_en.get(rid, [])),
-    }
+
+class RequestTrace:
+    """What the pipeline decided for one request and how long each stage took."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages_ms: dict = {}
+        self.decision: List[str] = []
+        self.scores: dict = {}
+        self.tokens: dict = {}
+        self.info: dict = {}
+        # Query embeddings computed ahead of time (batched), keyed by text
+        self.query_embs: dict = {}
+
+    def add_stage(self, name: str, ms: float) -> None:
+        self.stages_ms[name] = self.stages_ms.get(name, 0.0) + ms
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+CURRENT_TRACE: ContextVar[Optional[RequestTrace]] = ContextVar("CURRENT_TRACE", default=None)
+# Set while a speculative answer runs: LLM calls stop early when it fires
+CANCEL_EVENT: ContextVar[Optional[threading.Event]] = ContextVar("CANCEL_EVENT", default=None)
+
+
+@contextmanager
+def trace_stage(name: str):
+    """Time a pipeline stage into the current request trace (no-op outside a request)."""
+    trace = CURRENT_TRACE.get()
+    if trace is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_stage(name, (time.perf_counter() - t0) * 1000)
+
+
+def trace_decision(step: str, **scores) -> None:
+    """Append a routing step (and any similarity / confidence scores) to the trace."""
+    trace = CURRENT_TRACE.get()
+    if trace is None:
+        return
+    trace.decision.append(step)
+    trace.scores.update({k: round(float(v), 4) for k, v in scores.items()})
+
+
+def server_timing(trace: RequestTrace) -> str:
+    """Server-Timing header value: one metric per pipeline stage plus the total."""
+    parts = [f"{re.sub(r'[^A-Za-z0-9_-]', '-', name)};dur={ms:.1f}" for name, ms in trace.stages_ms.items()]
+    parts.append(f"total;dur={trace.total_ms():.1f}")
+    return ", ".join(parts)
+
+
+PROFILER = SamplingProfiler()
+
+QUERY_LOG = (
+    QueryLogger(
+        QUERY_LOG_DIR,
+        max_bytes=QUERY_LOG_MAX_MB * 1024 * 1024,
+        rotate_s=QUERY_LOG_ROTATE_HOURS * 3600,
+        queue_size=QUERY_LOG_QUEUE,
+    )
+    if QUERY_LOG_DIR
+    else None
+)
+
 
 # -------------------------------------------------------------
-# Add synthetic "museum info" room using the hard-coded texts
+# Load-adaptive degradation
 # -------------------------------------------------------------
-ROOM_DATA[INFO_ROOM_ID] = {
-    "room_id": INFO_ROOM_ID,
-    "heading": "Informazioni Museo / Museum info",
-    "url": "",
-    "text_it": MUSEUM_INFO_IT,
-    "text_en": MUSEUM_INFO_EN,
-}
 
-if INFO_ROOM_ID not in ROOM_IDS:
-    ROOM_IDS.append(INFO_ROOM_ID)
+# What each level gives up (levels are cumulative)
+DEGRADATION_LEVELS = [
+    "full",
+    "no-critic",
+    "embedding-room-selection",
+    "short-context",
+    "small-model",
+]
+
+
+class LoadController:
+    """
+    Watches how many /ask requests are in flight and the recent latency, and
+    moves one degradation level up or down at a time.
+
+    Up when the queue or the recent p90 latency is above the HIGH mark, down
+    when both are below the LOW mark. Levels change at most once every
+    DEGRADE_MIN_DWELL_S so a single slow answer does not make it flap.
+    Levels that would change nothing with this config (no critic to drop, no
+    DEGRADED_LLM_MODEL) are skipped; `level` keeps its DEGRADATION_LEVELS number.
+    """
 
-ROOM_IDS = sorted(ROOM_IDS)
+    def __init__(self):
+        self.level = 0
+        self.steps = [
+            n for n, mode in enumerate(DEGRADATION_LEVELS)
+            if not (mode == "no-critic" and not ENABLE_CRITIC)
+            and not (mode == "small-model" and not DEGRADED_LLM_MODEL)
+        ]
+        self.max_level = self.steps[-1]
+        self.inflight = 0
+        self.level_changes = 0
+        self._latencies: deque = deque()  # (finished_at, seconds)
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def _recent_latency(self, now: float) -> float:
+        while self._latencies and now - self._latencies[0][0] > DEGRADE_WINDOW_S:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        return float(np.percentile([lat for _, lat in self._latencies], 90))
+
+    def _update(self, now: float) -> None:
+        if not ENABLE_DEGRADATION or now - self._changed_at < DEGRADE_MIN_DWELL_S:
+            return
+        latency = self._recent_latency(now)
+        high = self.inflight >= DEGRADE_QUEUE_HIGH or latency >= DEGRADE_LATENCY_HIGH_S
+        low = self.inflight <= DEGRADE_QUEUE_LOW and latency <= DEGRADE_LATENCY_LOW_S
+        new_level = self.level
+        step = self.steps.index(self.level)
+        if high and self.level < self.max_level:
+            new_level = self.steps[step + 1]
+        elif low and self.level > 0:
+            new_level = self.steps[step - 1]
+        if new_level != self.level:
+            print(
+                f"[LOAD] level {self.level} -> {new_level} ({DEGRADATION_LEVELS[new_level]}); "
+                f"inflight={self.inflight} p90={latency:.1f}s"
+            )
+            self.level = new_level
+            self.level_changes += 1
+            self._changed_at = now
+
+    def enter(self) -> int:
+        """Register a new request and return the level it should run at."""
+        with self._lock:
+            self.inflight += 1
+            self._update(time.monotonic())
+            return self.level
+
+    def exit(self, started: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.inflight -= 1
+            self._latencies.append((now, now - started))
+            self._update(now)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "enabled": ENABLE_DEGRADATION,
+                "level": self.level,
+                "mode": DEGRADATION_LEVELS[self.level],
+                "max_level": self.max_level,
+                "inflight": self.inflight,
+                "recent_p90_latency_s": round(self._recent_latency(now), 3),
+                "level_changes": self.level_changes,
+            }
+
+
+LOAD = LoadController()
 
 
 # -------------------------------------------------------------
-# Custom per-room descriptions for the classifier
-# (keys MUST match scope_id values in chunks.csv)
+# Tenants: one museum = one index folder + profile, loaded on first use
 # -------------------------------------------------------------
 
-CUSTOM_ROOM_DESCRIPTIONS = {
-
-    "GDA-Sala-1": (
-        "Chronological overview of Abruzzo prehistory and protohistory, from the earliest Homo erectus and Neanderthals to the arrival of Homo sapiens, the Mesolithic crisis, the Neolithic agricultural revolution, and the later Copper, Bronze, and Iron Ages in the region. This room is ONLY about very ancient periods before the Roman Empire and before medieval or modern peasants: early humans, stone tools, the first Neolithic farmers and herders, the development of metallurgy, and the emergence of Italic peoples before and during Roman conquest.",
-        "Contains information on Paleolithic hunting, Mesolithic small-game strategies, Neolithic crops such as wheat, barley, and farro, the invention of impressed pottery, the building of the first huts and villages, and the spread of metal weapons and tools among warrior societies. Use this room for ANY question about the diet or daily life of Paleolithic, Mesolithic, Neolithic, Bronze Age or Iron Age people, Italic tribes, the Social War, or the collapse of Roman order after barbarian invasions – NOT the later contadini or 19th–20th century farmers."
-    ),
-
-    "GDA-Sala-2": (
-        "Thematic room dedicated to the sacred use of caves in Abruzzo, showing how natural grottoes became places of worship, ritual pits, and stone circles linked to the cult of Mother Earth from the Neolithic onward. It explains the difference between caves as sanctuaries for offerings and prayers versus open-air villages for everyday life, emphasizing religious practices rather than ordinary dwelling, farming, or domestic routines.",
-        "Includes the Grotta dei Piccioni with ritual deposits and child sacrifices, ex-votos in ceramic, stone, and bone, and the long continuity of pagan rites adapted into Christian worship by hermit monks and saints such as Saint Michael the Archangel. It focuses on cave sanctuaries, healing practices connected to rock and water, and modern pilgrimages to eremi and grottoes where pre-Christian traditions survive under Christian forms, unlike the broader landscape view in the Galleria del Territorio."
-    ),
-
-    "GDA-Sala-3": (
-        "Explores the continuity of objects, symbols, and rituals from prehistoric times to the twentieth century, showing how certain forms and motifs survive almost unchanged in Abruzzese popular culture. The focus is on long-term links between ancient amulets, protective devices, and decorative patterns and their later rural and Christian counterparts, rather than on a single period or one specific craft like textiles or ceramics.",
-        "Displays everyday tools such as ricottiere, lucerne, fusi, and trapani a volano, alongside magical-ritual objects like ciprea shells, cornetti, arrowhead pendants, and mask-like faces on buildings that echo ancient anti-evil symbols. The room also presents festivals with prehistoric roots, including solstice fires, carnival figures, agrarian fertility rites like the ballo della pupa, and Easter pastries shaped as hearts, dolls, and horses, complementing but not duplicating the detailed textile work of GDA-Sala-11 or marriage jewelry of GDA-Sala-12."
-    ),
-
-    "GDA-Sala-4": (
-        "Room dedicated to the clothing, equipment, and everyday world of Abruzzo shepherds, showing how they dressed, defended themselves, and crafted their own tools in a self-sufficient economy. It emphasizes sheepskin jackets, leather leggings, chiochie sandals, and the use of staffs, slings, umbrellas, and bags designed for a hard outdoor life on the move with flocks, rather than the architecture of stone huts or the legal aspects of transhumance.",
-        "Includes objects that highlight the shepherd as artisan and warrior, such as the mazza chiodata for defense, the mazzafionne sling inherited from ancient Italic slingers, carved wooden furniture and gifts, musical instruments like zampogna and ciaramella, and the crucial role of the Pastore Abruzzese-Maremmano dog with its spiked collar. The room underlines how pastoral work, pauses during grazing, and isolation produced a strong craft tradition and a heroic, story-telling culture among shepherds, distinct from the hut reconstructions of GDA-Sala-5 and GDA-Sala-6."
-    ),
-
-    "GDA-Sala-5": (
-        "Presents the stone pastoral huts known as tholos and the broader world of transhumant shepherding in Abruzzo, focusing on how seasonal movements shaped settlements and economic life. It explains why shepherds needed dry-stone shelters in high mountains, how these were built without mortar, and how the abundance of stone and the practice of monticazione favored this architecture, as opposed to the domestic rural houses shown in GDA-Sala-10.",
-        "Displays models and photographs of tholos villages on the Maiella and Gran Sasso, documents about the ancient and early-modern sheep economy, and maps of tratturi used for long-distance migrations between Abruzzo and Puglia. It also includes images of key tasks such as washing, branding, and shearing sheep, contracts and travel permits issued by the Bourbon state, and counting devices and registers used to manage large flocks and pay shepherds, complementing but not repeating the interior life-size hut of GDA-Sala-6."
-    ),
-
-    "GDA-Sala-6": (
-        "Contains a life-size reconstruction of a stone tholos hut and shows how a shepherd actually lived inside, with minimal furniture and tools arranged for survival in harsh mountain conditions. The architecture demonstrates how corbelled stones form a self-supporting dome without wood or mortar, solving the problem of roofing in a landscape where timber is scarce but stone is abundant, going into more physical detail than the models and photos of GDA-Sala-5.",
-        "The room also presents the arciclocco storage pole with hanging cauldrons and friscelle for cheese-making, highlighting the production of pecorino and other dairy foods as essential to pastoral life. Panels explain how centuries of such existence forged key Abruzzese traits such as frugality, toughness, solidarity, and low criminality, and describe the stazzo, a mobile fence enclosure used to protect the flock at night and moved with the shepherd during transhumance or monticazione; questions about shepherd character and identity rather than routes or contracts belong here."
-    ),
-
-    "GDA-Galleria-Armi-Guerrieri": (
-        "Large gallery tracing the evolution of weapons, armor, and warriors from the Copper Age through the Bronze and Iron Ages to the Roman period and the early Middle Ages, with a special focus on Abruzzo finds. It connects archaeological objects with the broader history of warfare, showing how new metals, tactics, and social structures changed the way conflicts were fought, rather than focusing on peaceful rural life or domestic crafts.",
-        "Displays blades, spearheads, helmets, shields, and circular bronze cuirasses typical of Italic warriors, along with the reconstructed grave 302 from the necropolis of Fossa and the full panoply of a Longobard fighter. The exhibition explains hoplite tactics, the rise of organized city-state armies, the professionalization of the Roman legion, and includes didactic areas where students can wear replica helmets, armor, and belts to experience ancient military equipment, complementing the more general prehistory of GDA-Sala-1."
-    ),
-
-    "GDA-Sala-7": (
-        "Room devoted to traditional cereal agriculture and the annual grain cycle in HISTORICAL rural Abruzzo (mainly early modern to 20th century), from plowing and sowing to harvesting, threshing, winnowing, and storage. It shows how techniques and tools for working wheat remained stable in the world of contadini and sharecroppers, but it is NOT about Paleolithic or Neolithic farmers or prehistoric food – those belong to GDA-Sala-1.",
-        "The central model and displays present animal-drawn aratri and erpici, hand sowing a spaglio, sickles and protective finger thimbles, correggiati for threshing, and wooden forks and shovels used for winnowing grain in the wind, along with measures for cereals and tools to protect and store harvests. Use this room for questions about the work, tools and environment of historic peasants and 18th–20th century agricultural life (harvest methods, scarecrows, field huts, measures, rural cereal economy), NOT for questions about prehistoric or Neolithic diets or the very first farmers."
-    ),
-
-    "GDA-Sala-8": (
-        "Thematic room split into two sectors: traditional transport systems and olive cultivation with oil production, both central to Abruzzo rural life beyond cereal farming. It explains how goods, water, firewood, and crops were moved by human carriers, pack animals, sleds, and carts over steep and often poorly maintained roads, as well as how olives were harvested and processed, without dealing in depth with wine or pork production (which belong to GDA-Sala-9).",
-        "Displays photographs and reconstructions of women carrying loads on the head with a spare cloth ring, mules equipped with decorated basti, wooden sleds for steep slopes, and parts of painted wagons. In the agricultural section it illustrates the olive harvest in November, cleaning and bagging of fruit, and the functioning of the frantoio with stone mill, press, fiscoli, and hearth, describing oil as cooking fat, lamp fuel, and medicinal remedy, together with tools and practices for mowing, drying, and storing hay in barns or outdoor haystacks."
-    ),
-
-    "GDA-Sala-9": (
-        "Room that continues the story of rural food production by focusing on viticulture, winemaking, and pig husbandry as pillars of domestic self-sufficiency in Abruzzo. It presents the historical development from pre-Roman wine culture through predominantly home-consumption vineyards to modern DOC labels like Montepulciano d'Abruzzo, Cerasuolo, Trebbiano, and Controguerra, clearly separate from olive-oil production (GDA-Sala-8) and grain agriculture (GDA-Sala-7).",
-        "The displays show grape harvest in baskets, pressing in stone or wooden vats called mese, traditional and mechanical presses, fermentation into novello wine, and storage in oak barrels for aging. The second half of the room is dedicated to the slaughter and complete use of the pig, including hanging carcasses, sausage machines, preserved cuts, and a variety of conservation methods such as salting, smoking, oil and vinegar packing, along with mortars and containers used for sauces, spices, jams, lard, blood puddings, and preserved tomatoes."
-    ),
-
-    "GDA-Sala-10": (
-        "Room focused on rural housing and domestic life, analyzing how Abruzzo homes were built and organized in mountain, hill, and coastal zones, and how architecture reflected economic conditions. It contrasts stone houses often embedded in rock, earth-and-straw dwellings, and brick or tuff constructions, and then moves inside to examine the division of work spaces and living quarters, rather than pastoral huts (GDA-Sala-5 and GDA-Sala-6) or prisons (GDA-Ceti-Urbani_Risorgimento).",
-        "Exhibits the lower level spaces such as stables, barns, cellars, and storerooms, and the upper domestic areas centered on the kitchen with fireplace, bread oven, and simple furniture like tables, benches, and the madia for flour and bread. The room highlights children's toys fashioned from cheap or recycled materials, describes the heavy domestic workload of women including water-carrying and washing, and shows beds with straw or wool mattresses, chests for trousseaux, cradles, and terracotta or metal oil lamps that illuminated the house at night."
-    ),
-
-    "GDA-Sala-11": (
-        "Explores the complete production cycle of textile fibers, especially linen and wool, in a context where spinning and weaving were mainly domestic and female tasks aimed at family self-sufficiency. It follows the process from field to finished fabric, explaining sowing, harvesting, seed extraction, retting in water, drying, breaking, and combing the fibers before spinning, focusing on techniques rather than on the social rituals of clothing at weddings (GDA-Sala-12).",
-        "Displays tools such as the wooden trocche for breaking stems, the ràscele combs, distaff and spindle, and later the small spinning wheel known as felarelle, as well as looms commissioned from carpenters and used in many households. The room also presents simple and patterned linens for sheets, towels, and tablecloths, discusses the flourishing wool craft tradition of mountain centers like Sulmona, Scanno, and Taranta Peligna, and shows blankets and carpets called tarante decorated with geometric and symbolic motifs such as flower vases, trees of life, animals, and stylized human figures."
-    ),
-
-    "GDA-Sala-12": (
-        "Room dedicated to the life-cycle moment of marriage and the way clothing, dowries, and jewelry expressed social status, gender roles, and values in traditional Abruzzo society. It follows the sequence from courtship and family agreements through the formal promise, exchange of gifts, and preparation of the bride's corredo to the celebration and transfer to the groom's house, focusing on costumes and ornaments rather than on everyday textile production techniques (GDA-Sala-11).",
-        "Exhibits wedding and festive costumes, including dark or pastel dresses, traditional rural outfits, head coverings signaling whether a woman is single, married, or widowed, and the rare red eighteenth-century gown from Scanno. The room also focuses on jewelry and amulets such as filigree cannatora necklaces, presentosa pendants with hearts, sciacquajje earrings, children's protective charms and noisy contromalucchie, and a variety of silver buttons, buckles, pins, and multifunctional accessories that combine beauty, symbolism, and magical protection."
-    ),
-
-    "GDA-Sala-13": (
-        "Room entirely devoted to Abruzzese maiolica and related ceramics, tracing their development from medieval times through the Renaissance, Baroque, and modern periods, and highlighting Abruzzo as one of the most important production areas in Western Europe. It explains what maiolica is, with its tin-glazed surface and painted decoration, and contrasts it with ingobbiata, invetriata, and graffita wares popular in the fifteenth century, focusing on ceramic art rather than on metalwork, textiles, or jewelry.",
-        "Shows luxury tableware, pharmacy jars, flower vases, shaving basins, devotional plaques, architectural elements like the famous San Donato ceiling from Castelli, and floor tiles and kitchen linings. It also presents the specialized ceramic towns such as Castelli, Anversa degli Abruzzi, Tagliacozzo, and Torre de' Passeri, then follows the eighteenth- and nineteenth-century decline toward cheaper, popular wares like simple bowls, pitchers, and scaldamani, as markets for aristocratic and export ceramics contracted."
-    ),
-
-    "GDA-Galleria-Territorio": (
-        "Panoramic gallery presenting Abruzzo as a 'museum in the open air', emphasizing its variety of landscapes from Adriatic coast to high Apennine peaks, the high proportion of land in national and regional parks, and its exceptional biodiversity. It shows how centuries of relative isolation preserved traditional environments, farming systems, and settlement patterns more than in many other Italian regions, giving a territorial overview instead of focusing on one craft or social group.",
-        "Panels and images highlight historic villages and town centers of ancient origin, the great artisanal traditions in ceramics, metalwork, textiles, and wood, and the special spiritual landscape of eremi and monasteries that shaped Abruzzese mentality. The gallery also explores the dense network of castles and fortified sites, explains how conserved original contexts reduce the need for museums, and reflects on the advantages and challenges of treating the whole region as a territory-museum where heritage remains embedded in its authentic surroundings."
-    ),
-
-    "GDA-Ceti-Urbani_Risorgimento": (
-        "Section devoted to the Borbonic prison in Pescara and the rise of modern urban bourgeois society in Abruzzo during the eighteenth and nineteenth centuries, especially in the context of the Risorgimento. It recounts how many young Abruzzese revolutionaries and members of the educated middle classes were chained and incarcerated here between 1850 and 1860 for political crimes linked to demands for Italian unity, constitution, and civil rights, unlike the rural or prehistoric focus of most other rooms.",
-        "Provides quantitative data on the bagno penale, the age and social background of the one hundred political prisoners, and the contrast between urban bourgeois modernizers and largely rural masses resistant to change. The displays also examine bourgeois cultural spaces such as palatial houses, salotti, cafés, and theaters where public opinion, secret societies like the Carboneria, and the idea of press freedom were formed, illustrating a shift from feudal structures to a mass society shaped by industrialization and global communication."
-    ),
-    "GDA-Info-Museo": (
-        "Sala dedicata alle informazioni pratiche sul Museo delle Genti d'Abruzzo e sul Museo Basilio Cascella: orari di apertura, prezzi dei biglietti, riduzioni e ingressi gratuiti, come arrivare, contatti, orari della biblioteca e del bookshop, servizi al pubblico e note su mostre ed eventi.",
-        "Room dedicated to practical information about the Genti d'Abruzzo Museum and the Basilio Cascella Museum: opening hours, ticket prices, discounts and free admission, how to get there, contact details, library and bookshop hours, visitor services, and notes on exhibitions and events."
-    ),
-
-}
-
-
-
-# Short descriptions per room for the LLM classifier
-ROOM_SHORT_DESC: dict = {}
-for rid in ROOM_IDS:
-    r = ROOM_DATA[rid]
-    custom = CUSTOM_ROOM_DESCRIPTIONS.get(rid)
-
-    if custom is not None:
-        # Join tuples/lists of sentences into a single description string
-        if isinstance(custom, (tuple, list)):
-            desc = " ".join(custom)
-        else:
-            desc = str(custom)
-    else:
-        # Fallback: heading + first chunk of room text
-        text = (r["text_en"] or r["text_it"]).strip()
-        desc = f"{r['heading']}: {text[:240]}"
 
-    ROOM_SHORT_DESC[rid] = desc
+class UnknownTenant(Exception):
+    pass
 
 
-# Pre-compute embeddings for room selection (heading + short text)
-room_texts_for_emb = []
-for rid in ROOM_IDS:
-    r = ROOM_DATA[rid]
-    base = r["heading"] + "\n" + (r["text_en"] or r["text_it"])
-    room_texts_for_emb.append(base[:1000])
+class Tenant:
+    """
+    Everything the pipeline needs for one museum: its rooms (aggregated from
+    meta.sqlite), classifier descriptions, room embeddings and profile.
+    """
 
-if room_texts_for_emb:
-    ROOM_EMBS = embed_model.encode(room_texts_for_emb, normalize_embeddings=True)
-    ROOM_EMBS = np.asarray(ROOM_EMBS, dtype=np.float32)
-else:
-    ROOM_EMBS = np.zeros((0, 1), dtype=np.float32)
+    def __init__(self, tenant_id: str, index_dir: str, profile: dict):
+        self.tenant_id = tenant_id
+        self.index_dir = index_dir
+        self.profile = profile
+        self.info_room_id = profile["info_room_id"]
+
+        self.room_ids: List[str] = []
+        self.room_data: dict = {}
+        self._load_rooms()
+        self.room_short_desc = self._build_short_descriptions()
+        self.room_embs, self.room_emb_scales = self._embed_rooms()
+        self.sentences: List[dict] = []
+        self.sentence_langs: List[str] = []
+        self.sentence_rows: dict = {}
+        self.sentence_embs, self.sentence_scales = np.zeros((0, 1), dtype=np.float32), None
+        if ENABLE_EXTRACTIVE:
+            self._embed_sentences()
+        self.router = load_router(index_dir, self.room_ids, EMBED_MODEL)
+        self.content_hash = self._content_hash()
+
+    def _load_rooms(self) -> None:
+        agg_it = defaultdict(list)
+        agg_en = defaultdict(list)
+        room_heading = {}
+        room_url = {}
+        machine_en = set()
+
+        # Chunks stay on disk; only the per-room aggregates are kept in memory.
+        # We only care about room-level records for this architecture
+        for rec in open_store(self.index_dir).iter_chunks(scope_type="room"):
+            rid = rec["scope_id"]
+            # Passages may repeat the tail of the previous one; only keep the new part
+            text_it = passage_body(rec, "it")
+            text_en = passage_body(rec, "en")
+
+            if text_it:
+                agg_it[rid].append(text_it)
+            if text_en:
+                agg_en[rid].append(text_en)
+                if rec.get("text_en_source") == "machine":
+                    machine_en.add(rid)
+
+            if rid not in room_heading and rec.get("heading"):
+                room_heading[rid] = rec["heading"]
+            if rid not in room_url and rec.get("url"):
+                room_url[rid] = rec["url"]
+
+        room_ids = sorted(agg_it.keys())
+        for rid in room_ids:
+            self.room_data[rid] = {
+                "room_id": rid,
+                "heading": room_heading.get(rid, f"Room {rid}"),
+                "url": room_url.get(rid, ""),
+                "text_it": " ".join(agg_it[rid]),
+                "text_en": " ".join(agg_en.get(rid, [])),
+                # English translated at ingest (app/translate.py), at least in part
+                "text_en_machine": rid in machine_en,
+            }
+
+        # Synthetic "museum info" room using the profile texts
+        self.room_data[self.info_room_id] = {
+            "room_id": self.info_room_id,
+            "heading": self.profile["info_heading"],
+            "url": "",
+            "text_it": self.profile["info_it"],
+            "text_en": self.profile["info_en"],
+            "text_en_machine": False,
+        }
+        if self.info_room_id not in room_ids:
+            room_ids.append(self.info_room_id)
+
+        self.room_ids = sorted(room_ids)
+
+    def _build_short_descriptions(self) -> dict:
+        """Short descriptions per room for the LLM classifier."""
+        custom_descriptions = self.profile.get("room_descriptions") or {}
+        short_desc = {}
+        for rid in self.room_ids:
+            r = self.room_data[rid]
+            custom = custom_descriptions.get(rid)
+
+            if custom is not None:
+                # Join tuples/lists of sentences into a single description string
+                if isinstance(custom, (tuple, list)):
+                    desc = " ".join(custom)
+                else:
+                    desc = str(custom)
+            else:
+                # Fallback: heading + first chunk of room text
+                text = (r["text_en"] or r["text_it"]).strip()
+                desc = f"{r['heading']}: {text[:240]}"
+
+            short_desc[rid] = desc
+        return short_desc
+
+    def _embed_rooms(self) -> tuple:
+        """Pre-compute embeddings for room selection (heading + short text) as (codes, scales)."""
+        room_texts_for_emb = []
+        for rid in self.room_ids:
+            r = self.room_data[rid]
+            base = r["heading"] + "\n" + (r["text_en"] or r["text_it"])
+            room_texts_for_emb.append(base[:1000])
+        return self._cached_embeddings("room_embs", room_texts_for_emb)
+
+    def _embed_sentences(self) -> None:
+        """Sentence index for extractive answers: every room split once, embedded once."""
+        self.sentences = room_sentences(self.room_data)
+        self.sentence_langs = [s["lang"] for s in self.sentences]
+        by_room = defaultdict(list)
+        for n, s in enumerate(self.sentences):
+            by_room[s["room_id"]].append(n)
+        self.sentence_rows = {rid: np.array(rows, dtype=np.int64) for rid, rows in by_room.items()}
+        self.sentence_embs, self.sentence_scales = self._cached_embeddings(
+            "sentence_embs", [s["text"] for s in self.sentences]
+        )
+
+    def _cached_embeddings(self, name: str, texts: List[str]) -> tuple:
+        """Normalized embeddings of `texts` as (codes, scales), cached next to the index."""
+        if not texts:
+            return np.zeros((0, 1), dtype=np.float32), None
+        if not MMAP_EMBEDDINGS:
+            embs = embed_model.encode(texts, normalize_embeddings=True)
+            return quantize(embs, EMBED_DTYPE)
+
+        # Cache keyed on model + dtype + texts: the first worker encodes and writes
+        # it, every worker then maps the same file read-only (one copy in the page cache)
+        key = hashlib.sha1("\0".join([EMBED_MODEL, EMBED_DTYPE, *texts]).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.index_dir, f"{name}-{key}.npy")
+        if not os.path.exists(path):
+            codes, scales = quantize(embed_model.encode(texts, normalize_embeddings=True), EMBED_DTYPE)
+            try:
+                save_embeddings(path, codes, scales)
+            except OSError as e:
+                print(f"[TENANT] {self.tenant_id}: cannot cache {name} ({e}), keeping them in memory")
+                return codes, scales
+        return load_embeddings(path, mmap=True)
+
+    def _content_hash(self) -> str:
+        """Changes whenever anything that shapes an answer changes: texts, profile, router, models, settings."""
+        h = hashlib.sha1()
+        for name in ("meta.sqlite", "router.npz"):
+            path = os.path.join(self.index_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        h.update(block)
+        h.update(json.dumps(self.profile, sort_keys=True, default=str).encode("utf-8"))
+        h.update("\0".join([EMBED_MODEL, EMBED_DTYPE, LLM_MODEL, CRITIC_MODEL, str(ENABLE_CRITIC)]).encode("utf-8"))
+        # Settings that change which room is picked or what the answer says
+        settings = [
+            MAX_CTX_CHARS,
+            ROOM_MIN_SIM,
+            ROUTER_MIN_CONF,
+            ROUTER_ESCALATE_TOP_K,
+            ENABLE_EXTRACTIVE,
+            EXTRACTIVE_MAX_SENTENCES,
+            EXTRACTIVE_MIN_SIM,
+            EXTRACTIVE_SHORT_Q_WORDS,
+            EXTRACTIVE_SHORT_MIN_SIM,
+        ]
+        h.update("\0".join(map(str, settings)).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def room_scores(self, q_emb: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a normalized query embedding with every room."""
+        return scores(self.room_embs, self.room_emb_scales, q_emb)
+
+    def sentence_scores(self, q_emb: np.ndarray, room_id: str) -> tuple:
+        """(sentence rows, cosine similarities) for one room's sentences."""
+        rows = self.sentence_rows.get(room_id)
+        if rows is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scales = self.sentence_scales[rows] if self.sentence_scales is not None else None
+        return rows, scores(self.sentence_embs[rows], scales, q_emb)
+
+    def nbytes(self) -> int:
+        """Rough resident size, used for the tenant memory budget."""
+        # Memory-mapped embeddings live in the shared page cache, not in this process
+        total = 0
+        for codes, scales in ((self.room_embs, self.room_emb_scales), (self.sentence_embs, self.sentence_scales)):
+            if not isinstance(codes, np.memmap):
+                total += int(codes.nbytes)
+                if scales is not None:
+                    total += int(scales.nbytes)
+        total += sum(sys.getsizeof(s["text"]) for s in self.sentences)
+        for r in self.room_data.values():
+            total += sum(sys.getsizeof(v) for v in r.values())
+        total += sum(sys.getsizeof(v) for v in self.room_short_desc.values())
+        if self.router is not None:
+            total += int(self.router.W.nbytes)
+        return total
+
+
+class TenantRegistry:
+    """
+    Lazily loaded tenants kept in LRU order.
+
+    When the loaded tenants exceed TENANT_MEM_BUDGET_MB, the least recently
+    used ones are dropped (never the one just requested). Requests already
+    holding a Tenant keep using it until they finish.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Only for ids with an index folder, dropped on eviction: arbitrary
+        # ids from clients must not grow this dict
+        self._load_locks: dict = {}
+
+    def index_dir_for(self, tenant_id: str) -> str:
+        if tenant_id == DEFAULT_TENANT:
+            return INDEX_DIR
+        if not TENANT_ID_RE.match(tenant_id):
+            raise UnknownTenant(tenant_id)
+        path = os.path.join(TENANTS_DIR, tenant_id)
+        if not os.path.isdir(path):
+            raise UnknownTenant(tenant_id)
+        return path
+
+    def get(self, tenant_id: Optional[str]) -> Tenant:
+        tenant_id = (tenant_id or DEFAULT_TENANT).strip()
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._tenants.move_to_end(tenant_id)
+                return tenant
+
+        index_dir = self.index_dir_for(tenant_id)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+
+        # Load outside the registry lock so other tenants keep serving;
+        # the per-tenant lock makes concurrent first requests load once.
+        with load_lock:
+            with self._lock:
+                tenant = self._tenants.get(tenant_id)
+                if tenant is not None:
+                    self._tenants.move_to_end(tenant_id)
+                    return tenant
+
+            if tenant_id == DEFAULT_TENANT:
+                profile = load_profile(index_dir, DEFAULT_PROFILE)
+            else:
+                try:
+                    profile = load_profile(index_dir, GENERIC_PROFILE, required=TENANT_REQUIRED_KEYS)
+                except ProfileError as e:
+                    print(f"[TENANT] rejected {tenant_id!r}: {e}")
+                    raise
+            t0 = time.perf_counter()
+            tenant = Tenant(tenant_id, index_dir, profile)
+            print(
+                f"[TENANT] loaded {tenant_id!r} from {index_dir}: {len(tenant.room_ids)} rooms, "
+                f"router={'yes' if tenant.router else 'no'}, "
+                f"{tenant.nbytes() / 1e6:.1f} MB in {time.perf_counter() - t0:.1f}s"
+            )
+
+            with self._lock:
+                self._tenants[tenant_id] = tenant
+                self._evict_over_budget(keep=tenant_id)
+        return tenant
+
+    def _evict_over_budget(self, keep: str) -> None:
+        total = sum(t.nbytes() for t in self._tenants.values())
+        for tid in list(self._tenants):
+            if total <= self.budget_bytes:
+                break
+            if tid == keep:
+                continue
+            evicted = self._tenants.pop(tid)
+            self._load_locks.pop(tid, None)
+            total -= evicted.nbytes()
+            print(f"[TENANT] evicted {tid!r} ({evicted.nbytes() / 1e6:.1f} MB) to stay under budget")
+
+    def loaded(self) -> dict:
+        with self._lock:
+            return {tid: len(t.room_ids) for tid, t in self._tenants.items()}
+
+
+TENANTS = TenantRegistry(TENANT_MEM_BUDGET_MB * 1024 * 1024)
+
+for _tid in PRELOAD_TENANTS:
+    TENANTS.get(_tid)
 
 # -------------------------------------------------------------
 # FastAPI models
 # -------------------------------------------------------------
 
 app = FastAPI(title="Museum Chatbot (room-level, Qwen)")
-app.mount("/app", StaticFiles(directory="web", html=True), name="web")
+if PRECOMPRESS_STATIC:
+    try:
+        compress_dir("web")
+    except OSError as e:
+        print(f"[STATIC] cannot precompress web/ ({e}); serving uncompressed files")
+app.mount(
+    "/app",
+    PrecompressedStaticFiles(directory="web", html=True, cache_control=STATIC_CACHE_CONTROL),
+    name="web",
+)
 
 
 class HistoryTurn(BaseModel):
@@ -431,6 +676,7 @@ class AskReq(BaseModel):
     room_id: Optional[str] = None       # optional scoping (QR)
     object_id: Optional[str] = None     # kept for compatibility, unused now
     history: Optional[List[HistoryTurn]] = None  # recent Q/A for pronoun resolution
+    mode: Optional[str] = None          # "fast": extractive answer, no LLM
 
 
 class Citation(BaseModel):
@@ -443,6 +689,9 @@ class AskResp(BaseModel):
     answer: str
     citations: List[Citation]
     lang: str
+    degradation_level: int = 0  # 0 = full quality, see /metrics
+    mode: str = "llm"           # "llm", "extractive", "extractive-fallback" or "llm-failed" (LLM failed)
+    dont_know: bool = False     # no answer found; the reply points to staff / contacts
 
 
 # -------------------------------------------------------------
@@ -465,17 +714,29 @@ def detect_lang(text: str, fallback: str = "it") -> str:
     return fallback
 
 
-def find_room_id(question: str) -> Optional[str]:
+def encode_query(text: str) -> np.ndarray:
+    """Normalized embedding of one query string."""
+    trace = CURRENT_TRACE.get()
+    if trace is not None and text in trace.query_embs:
+        return trace.query_embs[text]
+    with trace_stage("embed"):
+        emb = embed_model.encode([text], normalize_embeddings=True)[0]
+    if trace is not None:
+        trace.query_embs[text] = emb
+    return emb
+
+
+def find_room_id(tenant: Tenant, question: str) -> Optional[str]:
     """Pick the most relevant room for the question using embedding similarity."""
-    if ROOM_EMBS.shape[0] == 0:
+    if tenant.room_embs.shape[0] == 0:
         return None
-    q_emb = embed_model.encode([question], normalize_embeddings=True)[0]
-    sims = ROOM_EMBS @ q_emb
+    q_emb = encode_query(question)
+    sims = tenant.room_scores(q_emb)
     best_idx = int(np.argmax(sims))
     best_sim = float(sims[best_idx])
     if best_sim < ROOM_MIN_SIM:
         return None
-    return ROOM_IDS[best_idx]
+    return tenant.room_ids[best_idx]
 
 
 def build_room_selection_text(question: str, history: Optional[List[HistoryTurn]]) -> str:
@@ -529,16 +790,17 @@ def build_history_block(history: Optional[List[HistoryTurn]]) -> str:
     return block
 
 
-def answer_logistics(q: str, lang: str) -> str:
+def answer_logistics(tenant: Tenant, q: str, lang: str) -> str:
     """
     Answer opening hours / tickets / contacts using the museum info text.
     Reuses the same grounded LLM call used for rooms.
     """
     is_en = (lang or "").lower().startswith("en")
-    context = MUSEUM_INFO_EN if is_en else MUSEUM_INFO_IT
+    context = tenant.profile["info_en"] if is_en else tenant.profile["info_it"]
 
     # We use the same grounded call as for rooms, but no history
     return call_llm_with_room(
+        tenant,
         context=context,
         question=q,
         lang=lang,
@@ -546,14 +808,39 @@ def answer_logistics(q: str, lang: str) -> str:
     )
 
 
+def _ollama_stream(payload: dict, cancel: threading.Event, tag: str) -> Optional[dict]:
+    """
+    Streamed /api/chat that gives up as soon as `cancel` is set; closing the
+    connection makes Ollama stop generating. Returns the final chunk with the
+    whole reply as message.content, or None when cancelled.
+    """
+    parts = []
+    with OLLAMA_SESSION.post(f"{OLLAMA_URL}/api/chat", json=payload, stream=True, timeout=120) as resp:
+        print(f"[{tag}] HTTP status: {resp.status_code}")
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if cancel.is_set():
+                return None
+            if not line:
+                continue
+            chunk = json.loads(line)
+            parts.append(chunk.get("message", {}).get("content", ""))
+            if chunk.get("done"):
+                chunk["message"] = {"content": "".join(parts)}
+                return chunk
+    return {"message": {"content": "".join(parts)}}
+
+
 def ollama_chat(model: str, system_prompt: str, user_msg: str, tag: str = "LLM", temperature: float = 0.0) -> str:
+    # Inside a speculative answer or a batch the call must be cancellable, so it streams
+    cancel = CANCEL_EVENT.get()
     payload = {
         "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_msg},
         ],
-        "stream": False,
+        "stream": cancel is not None,
         "options": {"temperature": temperature},
     }
     try:
@@ -561,12 +848,24 @@ def ollama_chat(model: str, system_prompt: str, user_msg: str, tag: str = "LLM",
         print(f"[{tag}] system prompt preview: {system_prompt[:120]!r}")
         print(f"[{tag}] user_msg preview: {user_msg[:200]!r}\n")
 
-        resp = requests.post(f"{OLLAMA_URL}/api/chat", json=payload, timeout=120)
-        print(f"[{tag}] HTTP status: {resp.status_code}")
-        resp.raise_for_status()
+        with trace_stage(tag.lower()):
+            if cancel is not None:
+                data = _ollama_stream(payload, cancel, tag)
+            else:
+                resp = OLLAMA_SESSION.post(f"{OLLAMA_URL}/api/chat", json=payload, timeout=120)
+                print(f"[{tag}] HTTP status: {resp.status_code}")
+                resp.raise_for_status()
+                data = resp.json()
+        if data is None:
+            print(f"[{tag}] cancelled\n")
+            return ""
 
-        data = resp.json()
         content = data.get("message", {}).get("content", "").strip()
+        trace = CURRENT_TRACE.get()
+        if trace is not None:
+            used = trace.tokens.setdefault(tag.lower(), {"prompt": 0, "completion": 0})
+            used["prompt"] += int(data.get("prompt_eval_count") or 0)
+            used["completion"] += int(data.get("eval_count") or 0)
         print(f"[{tag}] raw reply preview: {content[:200]!r}\n")
         return content
     except Exception as e:
@@ -574,20 +873,25 @@ def ollama_chat(model: str, system_prompt: str, user_msg: str, tag: str = "LLM",
         return ""
 
 
-def get_room_candidates(selector_text: str, top_k: int = 5) -> List[tuple[str, float]]:
+def get_room_candidates(tenant: Tenant, selector_text: str, top_k: int = 5) -> List[tuple[str, float]]:
     """Return top-k rooms by embedding similarity."""
-    if ROOM_EMBS.shape[0] == 0:
+    if tenant.room_embs.shape[0] == 0:
         return []
     selector_text = (selector_text or "").strip()
     if not selector_text:
         return []
-    q_emb = embed_model.encode([selector_text], normalize_embeddings=True)[0]
-    sims = ROOM_EMBS @ q_emb
+    q_emb = encode_query(selector_text)
+    sims = tenant.room_scores(q_emb)
     order = np.argsort(-sims)[:top_k]
-    return [(ROOM_IDS[i], float(sims[i])) for i in order]
+    return [(tenant.room_ids[i], float(sims[i])) for i in order]
 
 
-def classify_room_with_llm(question: str, lang: str, candidates: List[tuple[str, float]]) -> Optional[str]:
+def classify_room_with_llm(
+    tenant: Tenant,
+    question: str,
+    lang: str,
+    candidates: List[tuple[str, float]],
+) -> Optional[str]:
     """
     Use the main 7B model as a classifier over a list of candidate rooms.
     Returns a room_id from candidates, or None on failure.
@@ -600,7 +904,7 @@ def classify_room_with_llm(question: str, lang: str, candidates: List[tuple[str,
     # Build candidate list with short descriptions
     lines = []
     for rid, score in candidates:
-        desc = ROOM_SHORT_DESC.get(rid, ROOM_DATA[rid]["heading"])
+        desc = tenant.room_short_desc.get(rid, tenant.room_data[rid]["heading"])
         lines.append(f'- "{rid}": {desc}')
     rooms_block = "\n".join(lines)
 
@@ -653,43 +957,87 @@ def classify_room_with_llm(question: str, lang: str, candidates: List[tuple[str,
     return None
 
 
-def select_room_id(question: str, lang: str, history: Optional[List[HistoryTurn]]) -> Optional[str]:
+def select_room_id(
+    tenant: Tenant,
+    question: str,
+    lang: str,
+    history: Optional[List[HistoryTurn]],
+    use_llm: bool = True,
+    speculate: Optional[Callable[[str], None]] = None,
+) -> Optional[str]:
     """
     Decide which room to use.
 
     We combine the current question with recent user questions so that
     follow-ups like "How many died?" stay in the same room, while still
     letting the classifier choose freely when the topic changes.
+    With use_llm=False (degraded mode) the LLM classifier is skipped.
+    If given, speculate(room_id) is called with the best embedding guess
+    right before the LLM classifier starts.
     """
     selector_text = build_room_selection_text(question, history)
     selector_text = (selector_text or "").strip()
     if not selector_text:
         return None
 
-    # 1) Try the 7B classifier over all rooms
-    candidates = [(rid, 0.0) for rid in ROOM_IDS]
-    rid = classify_room_with_llm(selector_text, lang, candidates)
-    if rid and rid in ROOM_DATA:
-        print(f"[ROOM] LLM classifier chose: {rid}")
-        return rid
+    q_emb = None
+    candidates = [(rid, 0.0) for rid in tenant.room_ids]
+
+    # 1) Learned router (if trained): confident answers skip the LLM entirely,
+    #    otherwise its top rooms become the LLM classifier's candidates
+    if tenant.router is not None:
+        q_emb = encode_query(selector_text)
+        ranked = tenant.router.rank(q_emb, top_k=ROUTER_ESCALATE_TOP_K)
+        best_rid, conf = ranked[0]
+        min_conf = ROUTER_MIN_CONF if use_llm else ROUTER_DEGRADED_MIN_CONF
+        if conf >= min_conf:
+            print(f"[ROOM] router chose: {best_rid} (p={conf:.2f})")
+            trace_decision(f"router:{best_rid}", router_p=conf)
+            return best_rid
+        trace_decision("router-unsure", router_p=conf)
+        if use_llm:
+            print(f"[ROOM] router unsure (p={conf:.2f}), asking LLM over {len(ranked)} rooms.")
+            candidates = ranked
+
+    # 2) Try the 7B classifier over the candidate rooms
+    if use_llm and speculate is not None and tenant.room_embs.shape[0] > 0:
+        if tenant.router is not None:
+            speculate(candidates[0][0])
+        else:
+            q_emb = encode_query(selector_text)
+            speculate(tenant.room_ids[int(np.argmax(tenant.room_scores(q_emb)))])
+
+    if use_llm:
+        rid = classify_room_with_llm(tenant, selector_text, lang, candidates)
+        if rid and rid in tenant.room_data:
+            print(f"[ROOM] LLM classifier chose: {rid} q={selector_text!r}")
+            trace_decision(f"llm:{rid}")
+            return rid
 
-    print("[ROOM] LLM classifier failed or invalid, trying embeddings.")
+        print("[ROOM] LLM classifier failed or invalid, trying embeddings.")
+        trace_decision("llm-failed")
+    else:
+        print("[ROOM] degraded mode, using embeddings only.")
+        trace_decision("embedding-only")
 
-    # 2) Fallback: embeddings on the same combined text
-    if ROOM_EMBS.shape[0] == 0:
+    # 3) Fallback: embeddings on the same combined text
+    if tenant.room_embs.shape[0] == 0:
         return None
 
-    q_emb = embed_model.encode([selector_text], normalize_embeddings=True)[0]
-    sims = ROOM_EMBS @ q_emb
+    if q_emb is None:
+        q_emb = encode_query(selector_text)
+    sims = tenant.room_scores(q_emb)
     best_idx = int(np.argmax(sims))
     best_sim = float(sims[best_idx])
-    best_rid = ROOM_IDS[best_idx]
+    best_rid = tenant.room_ids[best_idx]
     print(f"[ROOM] embedding best: {best_rid} (sim={best_sim:.3f})")
 
     if best_sim < ROOM_MIN_SIM:
         print(f"[ROOM] best below threshold {ROOM_MIN_SIM}, abstaining.")
+        trace_decision("abstain", embedding_sim=best_sim)
         return None
 
+    trace_decision(f"embedding:{best_rid}", embedding_sim=best_sim)
     return best_rid
 
     # 3) If we get here, the CURRENT question is ambiguous.
@@ -708,18 +1056,18 @@ def select_room_id(question: str, lang: str, history: Optional[List[HistoryTurn]
             print(f"[ROOM] current question ambiguous, using last user question as fallback: {last_user_q!r}")
 
             # 3a) Try LLM classifier on last question
-            rid_prev = classify_room_with_llm(last_user_q, lang, candidates)
-            if rid_prev and rid_prev in ROOM_DATA:
+            rid_prev = classify_room_with_llm(tenant, last_user_q, lang, candidates)
+            if rid_prev and rid_prev in tenant.room_data:
                 print(f"[ROOM] LLM classifier chose (last question): {rid_prev}")
                 return rid_prev
 
             # 3b) Embedding fallback on last question
-            if ROOM_EMBS.shape[0] > 0:
-                prev_emb = embed_model.encode([last_user_q], normalize_embeddings=True)[0]
-                sims_prev = ROOM_EMBS @ prev_emb
+            if tenant.room_embs.shape[0] > 0:
+                prev_emb = encode_query(last_user_q)
+                sims_prev = tenant.room_scores(prev_emb)
                 best_idx_prev = int(np.argmax(sims_prev))
                 best_sim_prev = float(sims_prev[best_idx_prev])
-                best_rid_prev = ROOM_IDS[best_idx_prev]
+                best_rid_prev = tenant.room_ids[best_idx_prev]
                 print(f"[ROOM] embedding (last question) best: {best_rid_prev} (sim={best_sim_prev:.3f})")
                 if best_sim_prev >= ROOM_MIN_SIM:
                     return best_rid_prev
@@ -785,32 +1133,74 @@ def build_critic_prompts(
     return system_prompt, user_msg
 
 
+def dont_know_message(tenant: Tenant, lang: str) -> str:
+    email = tenant.profile["email"]
+    if lang.startswith("en"):
+        return f"I don't quite know how to answer this question. For more info, please check the website or email a member of staff at {email}"
+    return f"Non lo so, puoi mandare un email a {email} per informazioni"
+
+
+class ExtractiveStats:
+    """How often each extractive path answered (see /metrics)."""
+
+    def __init__(self):
+        self.counts = {"fast": 0, "short": 0, "fallback": 0, "fallback_empty": 0}
+        self._lock = threading.Lock()
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.counts[path] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"enabled": ENABLE_EXTRACTIVE, **self.counts}
+
+
+EXTRACTIVE_STATS = ExtractiveStats()
+
+
+def extractive_answer(tenant: Tenant, q: str, lang: str, room_id: str) -> tuple[str, float]:
+    """The room sentences closest to the question as (answer, best similarity); ("", 0) if none."""
+    if not tenant.sentences:
+        return "", 0.0
+    q_emb = encode_query(q)
+    with trace_stage("extract"):
+        rows, sims = tenant.sentence_scores(q_emb, room_id)
+        chosen, best = pick_sentences(sims, rows, tenant.sentence_langs, lang[:2], EXTRACTIVE_MAX_SENTENCES)
+    print(f"[EXTRACT] room_id={room_id} best sim={best:.3f} sentences={len(chosen)}")
+    return " ".join(tenant.sentences[n]["text"] for n in chosen), best
+
+
 def call_llm_with_room(
+    tenant: Tenant,
     context: str,
     question: str,
     lang: str,
     history: Optional[List[HistoryTurn]] = None,
+    level: int = 0,
 ) -> str:
     """
     Call local Qwen via Ollama with strong grounding + small sliding window.
     Optionally run a second critic pass to self-check the answer.
+    `level` is the load degradation level (see DEGRADATION_LEVELS).
+    Returns "" when Ollama fails, so the caller can fall back.
     """
     lang = (lang or "it").lower()
     is_en = lang.startswith("en")
+    profile = tenant.profile
+    dont_know = dont_know_message(tenant, lang)
 
     if is_en:
-        dont_know = "I don't quite know how to answer this question. For more info, please check the website or email a member of staff at museo@gentidabruzzo.it"
         system_prompt = (
-            "You are a museum guide at the Genti d'Abruzzo museum.\n"
+            f"You are a museum guide at the {profile['name_en']}.\n"
             "You will receive the full official text for one room (the room context) and a visitor question.\n"
             "Use ONLY the information in the room context to answer the question.\n"
             f"If the room context really does not contain the answer, reply exactly: {dont_know}\n"
             "Always answer in ENGLISH, in at most 3 short sentences."
         )
     else:
-        dont_know = "Non lo so, puoi mandare un email a museo@gentidabruzzo.it per informazioni"
         system_prompt = (
-            "Sei una guida del Museo delle Genti d'Abruzzo.\n"
+            f"Sei una guida del {profile['name_it']}.\n"
             "Riceverai il testo ufficiale di una sala (contesto della sala) e una domanda del visitatore.\n"
             "Usa SOLO le informazioni presenti nel contesto della sala per rispondere.\n"
             f"Se il contesto davvero non contiene la risposta, rispondi esattamente: {dont_know}\n"
@@ -818,9 +1208,14 @@ def call_llm_with_room(
         )
 
 
+    max_ctx_chars = MAX_CTX_CHARS
+    if level >= 3:
+        max_ctx_chars = int(MAX_CTX_CHARS * DEGRADE_CTX_FACTOR)
+    model = DEGRADED_LLM_MODEL if (level >= 4 and DEGRADED_LLM_MODEL) else LLM_MODEL
+
     context = (context or "").strip()
-    if len(context) > MAX_CTX_CHARS:
-        context = context[:MAX_CTX_CHARS]
+    if len(context) > max_ctx_chars:
+        context = context[:max_ctx_chars]
 
     history_block = build_history_block(history)
 
@@ -863,12 +1258,12 @@ def call_llm_with_room(
     user_msg = "\n".join(user_msg_parts)
 
     # First pass: candidate answer
-    answer = ollama_chat(LLM_MODEL, system_prompt, user_msg, tag="LLM", temperature=0.0)
+    answer = ollama_chat(model, system_prompt, user_msg, tag="LLM", temperature=0.0)
     if not answer:
-        answer = dont_know
+        return ""
 
-    # Optional critic pass
-    if ENABLE_CRITIC:
+    # Optional critic pass (first thing dropped under load)
+    if ENABLE_CRITIC and level < 1:
         critic_system, critic_user = build_critic_prompts(context, question, answer, lang, dont_know)
         critic_answer = ollama_chat(CRITIC_MODEL, critic_system, critic_user, tag="CRITIC", temperature=0.0)
         if critic_answer:
@@ -882,17 +1277,450 @@ def call_llm_with_room(
 # -------------------------------------------------------------
 
 
+def get_tenant(museum: Optional[str]) -> Tenant:
+    """Resolve a museum id (path segment or X-Museum header) to a loaded tenant."""
+    try:
+        return TENANTS.get(museum)
+    except UnknownTenant:
+        raise HTTPException(status_code=404, detail=f"Unknown museum: {museum}")
+    except ProfileError:
+        # Details are in the server log
+        raise HTTPException(status_code=503, detail=f"Museum {museum} is not configured")
+
+
 @app.post("/ask", response_model=AskResp)
-def ask(req: AskReq):
+def ask(req: AskReq, response: Response, x_museum: Optional[str] = Header(default=None)):
+    return answer_question(get_tenant(x_museum), req, response)
+
+
+@app.post("/t/{museum}/ask", response_model=AskResp)
+def ask_tenant(museum: str, req: AskReq, response: Response):
+    return answer_question(get_tenant(museum), req, response)
+
+
+def answer_question(tenant: Tenant, req: AskReq, response: Optional[Response] = None) -> AskResp:
+    started = time.monotonic()
+    trace = RequestTrace()
+    token = CURRENT_TRACE.set(trace)
+    level = LOAD.enter()
+    try:
+        resp = run_pipeline(tenant, req, level)
+    finally:
+        LOAD.exit(started)
+        CURRENT_TRACE.reset(token)
+    resp.degradation_level = level
+    if SERVER_TIMING and response is not None:
+        response.headers["Server-Timing"] = server_timing(trace)
+    log_query(tenant, req, resp, trace)
+    if PROFILER.active:
+        PROFILER.request_done()
+    return resp
+
+
+def log_query(tenant: Tenant, req: AskReq, resp: AskResp, trace: RequestTrace) -> None:
+    """Hand one /ask to the background query log (never blocks on disk)."""
+    if QUERY_LOG is None:
+        return
+    QUERY_LOG.log(
+        {
+            "ts": time.time(),
+            "museum": tenant.tenant_id,
+            # Tenant-scoped path + original body: directly replayable
+            "path": f"/t/{tenant.tenant_id}/ask",
+            "request": req.model_dump(exclude_none=True),
+            "question": req.q,
+            "ui_lang": req.lang,
+            "detected_lang": trace.info.get("detected_lang"),
+            "lang": resp.lang,
+            "room_id": trace.info.get("room_id"),
+            "decision": trace.decision,
+            "scores": trace.scores,
+            "tokens": trace.tokens,
+            "context_chars": trace.info.get("context_chars"),
+            "stages_ms": {k: round(v, 1) for k, v in trace.stages_ms.items()},
+            "total_ms": round(trace.total_ms(), 1),
+            "degradation_level": resp.degradation_level,
+            "answer": resp.answer,
+        }
+    )
+
+
+# -------------------------------------------------------------
+# Cacheable GET answers for room-scoped FAQ questions
+# -------------------------------------------------------------
+
+
+@app.get("/answer", response_model=AskResp)
+def answer_get(
+    request: Request, response: Response, q: str, room_id: Optional[str] = None, lang: Optional[str] = None
+):
+    """Default museum only: a header-selected museum would make the URL ambiguous for caches."""
+    return cacheable_answer(get_tenant(DEFAULT_TENANT), request, response, q, room_id, lang)
+
+
+@app.get("/t/{museum}/answer", response_model=AskResp)
+def answer_get_tenant(
+    museum: str, request: Request, response: Response, q: str, room_id: Optional[str] = None, lang: Optional[str] = None
+):
+    return cacheable_answer(get_tenant(museum), request, response, q, room_id, lang)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if If-None-Match lists `etag` (weak or strong) or is "*"."""
+    for tag in request.headers.get("if-none-match", "").split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cacheable_answer(
+    tenant: Tenant, request: Request, response: Response, q: str, room_id: Optional[str], lang: Optional[str]
+):
+    """
+    Answers without history are deterministic (temperature 0) for a given
+    index, so the ETag is known before running the pipeline: a matching
+    If-None-Match is answered with 304 straight away, and browsers, the
+    museum proxy or a CDN can keep the answer for ANSWER_MAX_AGE_S.
+    """
+    q = " ".join((q or "").split())
+    if len(q) > ANSWER_GET_MAX_CHARS:
+        raise HTTPException(status_code=400, detail="Question too long for GET, use POST /ask")
+    key = "\0".join([tenant.content_hash, q, room_id or "", (lang or "").lower()])
+    etag = '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+    cache_control = f"public, max-age={ANSWER_MAX_AGE_S}"
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    resp = answer_question(tenant, AskReq(q=q, room_id=room_id, lang=lang), response)
+    if resp.degradation_level == 0 and resp.mode not in ("extractive-fallback", "llm-failed") and not resp.dont_know:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = cache_control
+    else:
+        # A degraded, fallback or "don't know" answer must not outlive the load spike / outage
+        response.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@app.get("/pack/{room_id}")
+def answer_pack(room_id: str, request: Request, response: Response):
+    return room_answer_pack(get_tenant(DEFAULT_TENANT), room_id, request, response)
+
+
+@app.get("/t/{museum}/pack/{room_id}")
+def answer_pack_tenant(museum: str, room_id: str, request: Request, response: Response):
+    return room_answer_pack(get_tenant(museum), room_id, request, response)
+
+
+def room_answer_pack(tenant: Tenant, room_id: str, request: Request, response: Response):
+    """
+    Common questions and answers for one room plus the museum-info ones,
+    built by app/answer_pack.py, for the widget to answer offline.
+    """
+    if room_id not in tenant.room_data:
+        raise HTTPException(status_code=404, detail=f"Unknown room: {room_id}")
+    etag = '"' + hashlib.sha1(f"{tenant.content_hash}\0{room_id}".encode("utf-8")).hexdigest()[:20] + '"'
+    cache_control = f"public, max-age={ANSWER_MAX_AGE_S}"
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    items = []
+    for rid in dict.fromkeys([room_id, tenant.info_room_id]):
+        pack = load_pack(tenant.index_dir, rid)
+        if pack is None:
+            continue
+        if pack.get("content_hash") != tenant.content_hash:
+            # Built from older texts: answering offline from it would be wrong
+            print(f"[PACK] {tenant.tenant_id}/{rid} is out of date, rebuild it with app/answer_pack.py")
+            continue
+        items.extend(pack["items"])
+    if not items:
+        raise HTTPException(status_code=404, detail=f"No answer pack for room {room_id}")
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return {"museum": tenant.tenant_id, "room_id": room_id, "items": items}
+
+
+# -------------------------------------------------------------
+# Batch endpoint: many questions in one call, streamed back as NDJSON
+# -------------------------------------------------------------
+
+
+@app.post("/ask/batch")
+def ask_batch(reqs: List[AskReq], x_museum: Optional[str] = Header(default=None)):
+    return stream_batch(get_tenant(x_museum), reqs)
+
+
+@app.post("/t/{museum}/ask/batch")
+def ask_batch_tenant(museum: str, reqs: List[AskReq]):
+    return stream_batch(get_tenant(museum), reqs)
+
+
+def stream_batch(tenant: Tenant, reqs: List[AskReq]) -> StreamingResponse:
+    if len(reqs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} questions per batch")
+    return StreamingResponse(run_batch(tenant, reqs), media_type="application/x-ndjson")
+
+
+def run_batch(tenant: Tenant, reqs: List[AskReq]):
+    """
+    1) embed every question that needs routing in one encode call,
+    2) route questions (the LLM classifier may run) and answer each one as
+       soon as it is routed, with at most BATCH_CONCURRENCY calls at once;
+       queued answers go room by room, so consecutive LLM calls share the
+       same system prompt + room text and Ollama can reuse its prompt cache.
+    One JSON line is yielded per question as soon as it is answered, then a
+    summary line. If the client goes away, queued work is dropped and running
+    LLM calls are cancelled.
+    """
+    started = time.perf_counter()
+    traces = [RequestTrace() for _ in reqs]
+    routed: dict = {}
+    failed: dict = {}
+
+    # 1) Batched embedding of the room-selection texts
+    pending = {}
+    for i, req in enumerate(reqs):
+        q = (req.q or "").strip()
+        if q and not req.room_id and not OFFTOPIC_RE.search(q):
+            pending[i] = build_room_selection_text(q, req.history).strip()
+    if pending:
+        t0 = time.perf_counter()
+        texts = sorted(set(pending.values()))
+        embs = embed_model.encode(texts, normalize_embeddings=True)
+        by_text = dict(zip(texts, embs))
+        share_ms = (time.perf_counter() - t0) * 1000 / len(pending)
+        for i, text in pending.items():
+            traces[i].query_embs[text] = by_text[text]
+            traces[i].add_stage("embed", share_ms)
+
+    cancel = threading.Event()
+
+    def in_trace(i: int, fn, *args):
+        token = CURRENT_TRACE.set(traces[i])
+        cancel_token = CANCEL_EVENT.set(cancel)
+        t0 = time.monotonic()
+        level = LOAD.enter()
+        try:
+            return level, fn(*args, level)
+        finally:
+            LOAD.exit(t0)
+            CANCEL_EVENT.reset(cancel_token)
+            CURRENT_TRACE.reset(token)
+
+    def item_line(i: int, payload: dict) -> str:
+        trace = traces[i]
+        return json.dumps(
+            {
+                "index": i,
+                **payload,
+                "room_id": trace.info.get("room_id"),
+                "stages_ms": {k: round(v, 1) for k, v in trace.stages_ms.items()},
+                "total_ms": round(trace.total_ms(), 1),
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+    workers = max(1, min(BATCH_CONCURRENCY, OLLAMA_POOL_SIZE))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    to_route = deque(range(len(reqs)))
+    by_room: "OrderedDict[str, deque]" = OrderedDict()  # routed, waiting for an answer slot
+    running: dict = {}  # future -> ("route" | "answer", index)
+    last_room = None
+    try:
+        while to_route or by_room or running:
+            # Fill free slots: answers first (same room as the previous one when
+            # possible), keeping one slot for routing while questions remain
+            while len(running) < workers and (to_route or by_room):
+                answering = sum(1 for kind, _ in running.values() if kind == "answer")
+                if by_room and (not to_route or answering < workers - 1):
+                    room = last_room if last_room in by_room else next(iter(by_room))
+                    i = by_room[room].popleft()
+                    if not by_room[room]:
+                        del by_room[room]
+                    last_room = room
+                    running[pool.submit(in_trace, i, answer_in_room, tenant, reqs[i], *routed[i])] = ("answer", i)
+                elif to_route:
+                    i = to_route.popleft()
+                    running[pool.submit(in_trace, i, route_request, tenant, reqs[i])] = ("route", i)
+                else:
+                    break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, i = running.pop(fut)
+                try:
+                    level, result = fut.result()
+                except Exception as e:
+                    failed[i] = str(e)
+                    yield item_line(i, {"error": str(e)})
+                    continue
+                if kind == "route":
+                    routed[i] = result
+                    by_room.setdefault(result[2] or "", deque()).append(i)
+                else:
+                    result.degradation_level = level
+                    log_query(tenant, reqs[i], result, traces[i])
+                    yield item_line(i, {"response": result.model_dump()})
+    finally:
+        # Normal end: nothing left. Client disconnect (GeneratorExit): drop the
+        # queue and make running streamed LLM calls close their connection.
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    yield json.dumps(
+        {
+            "done": True,
+            "count": len(reqs),
+            "errors": len(failed),
+            "rooms": len({r[2] for r in routed.values()}),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    ) + "\n"
+
+
+def run_pipeline(tenant: Tenant, req: AskReq, level: int = 0) -> AskResp:
+    spec = Speculation(tenant, req, level) if SPECULATIVE_ANSWERS and level == 0 else None
+    try:
+        q, lang, room_id = route_request(tenant, req, level, spec)
+        if spec is not None and spec.room_id is not None:
+            resp = spec.finish(room_id)
+            if resp is not None:
+                return resp
+        return answer_in_room(tenant, req, q, lang, room_id, level)
+    finally:
+        # Routing or answering may raise: never leave the speculative stream running
+        if spec is not None:
+            spec.cancel()
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.started = 0
+        self.agreed = 0
+        self.cancelled = 0
+        self.saved_ms = 0.0
+        self.wasted_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, agreed: bool, ms: float) -> None:
+        with self._lock:
+            self.started += 1
+            if agreed:
+                self.agreed += 1
+                self.saved_ms += ms
+            else:
+                self.cancelled += 1
+                self.wasted_ms += ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": SPECULATIVE_ANSWERS,
+                "started": self.started,
+                "agreed": self.agreed,
+                "cancelled": self.cancelled,
+                "agreement_rate": round(self.agreed / self.started, 3) if self.started else None,
+                "avg_saved_ms": round(self.saved_ms / self.agreed, 1) if self.agreed else None,
+                "avg_wasted_ms": round(self.wasted_ms / self.cancelled, 1) if self.cancelled else None,
+            }
+
+
+SPEC_STATS = SpeculationStats()
+
+
+class Speculation:
+    """
+    An answer generated on the best-guess room while the LLM classifier
+    decides. It runs in its own thread with its own trace; its timings and
+    token counts are merged into the request's trace only if it is kept.
+    """
+
+    def __init__(self, tenant: Tenant, req: AskReq, level: int):
+        self.tenant = tenant
+        self.req = req
+        self.level = level
+        self.room_id: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.trace = RequestTrace()
+        self.result: Optional[AskResp] = None
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, q: str, lang: str, room_id: str) -> None:
+        if room_id not in self.tenant.room_data:
+            return
+        self.room_id = room_id
+        self.started_at = time.perf_counter()
+        print(f"[SPEC] answering on {room_id} while the classifier runs")
+
+        def run():
+            CURRENT_TRACE.set(self.trace)
+            CANCEL_EVENT.set(self.cancel_event)
+            try:
+                self.result = answer_in_room(self.tenant, self.req, q, lang, room_id, self.level)
+            except Exception as e:
+                print(f"[SPEC] ERROR: {e}")
+            finally:
+                self.finished_at = time.perf_counter()
+
+        self._thread = threading.Thread(target=contextvars.Context().run, args=(run,), daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the speculative answer if it is still running (no-op once finished)."""
+        if self._thread is not None and self._thread.is_alive() and not self.cancel_event.is_set():
+            print(f"[SPEC] cancelled answer on {self.room_id}")
+        self.cancel_event.set()
+
+    def finish(self, room_id: Optional[str]) -> Optional[AskResp]:
+        """The speculative answer if the classifier picked the same room, else None (and cancel it)."""
+        routed_at = time.perf_counter()
+        trace = CURRENT_TRACE.get()
+        if room_id == self.room_id:
+            self._thread.join()
+            if self.result is not None:
+                # Time the answer ran in parallel with routing
+                saved = (min(routed_at, self.finished_at) - self.started_at) * 1000
+                SPEC_STATS.record(True, saved)
+                print(f"[SPEC] classifier agreed on {room_id}, saved {saved:.0f} ms")
+                if trace is not None:
+                    for name, ms in self.trace.stages_ms.items():
+                        trace.add_stage(name, ms)
+                    trace.tokens.update(self.trace.tokens)
+                    trace.info.update(self.trace.info)
+                    trace.info["room_id"] = room_id
+                    trace_decision("spec-hit", spec_saved_ms=saved)
+                return self.result
+            return None
+
+        self.cancel_event.set()
+        wasted = (routed_at - self.started_at) * 1000
+        SPEC_STATS.record(False, wasted)
+        print(f"[SPEC] classifier chose {room_id}, cancelled answer on {self.room_id}")
+        if trace is not None:
+            trace.add_stage("spec-cancelled", wasted)
+            trace_decision("spec-miss")
+        return None
+
+
+def route_request(
+    tenant: Tenant, req: AskReq, level: int = 0, spec: Optional[Speculation] = None
+) -> tuple[str, str, Optional[str]]:
+    """First half of the pipeline: (question, answer language, room_id or None)."""
     q = (req.q or "").strip()
     if not q:
-        lang = (req.lang or "it").lower()
-        msg = "Domanda vuota." if not lang.startswith("en") else "Empty question."
-        return AskResp(answer=msg, citations=[], lang=lang)
+        return q, (req.lang or "it").lower(), None
 
     # language: detect from text first
     auto_lang = detect_lang(q)          # "it" or "en"
     lang = auto_lang
+    trace = CURRENT_TRACE.get()
+    if trace is not None:
+        trace.info["detected_lang"] = auto_lang
 
     # If the client explicitly passes a lang AND it matches the detection, keep it.
     # If it disagrees (IT UI but EN text), trust the text.
@@ -905,36 +1733,54 @@ def ask(req: AskReq):
             print(f"[LANG] UI lang={req.lang} but text looks like {auto_lang}; using {auto_lang}.")
             lang = auto_lang
 
-    is_en = lang.startswith("en")
-
     # --------------------------------------------------
     # Room selection, with special handling for logistics
     # --------------------------------------------------
     if OFFTOPIC_RE.search(q):
         # Force the synthetic "museum info" room and skip classifier
-        room_id = INFO_ROOM_ID
+        room_id = tenant.info_room_id
         print(f"[ASK] logistics question detected, forcing room_id={room_id}")
+        trace_decision("logistics")
     else:
         if req.room_id:
             room_id = req.room_id
+            # Logged for train_router.py: QR scans are free labeled questions
+            print(f"[ROOM] QR scope: {room_id} q={q!r}")
+            trace_decision("qr")
         else:
-            room_id = select_room_id(q, lang, req.history)
-
-
-
+            with trace_stage("route"):
+                room_id = select_room_id(
+                    tenant,
+                    q,
+                    lang,
+                    req.history,
+                    use_llm=level < 2,
+                    speculate=(lambda rid: spec.start(q, lang, rid)) if spec is not None else None,
+                )
+    if trace is not None:
+        trace.info["room_id"] = room_id
+    return q, lang, room_id
+
+
+def answer_in_room(tenant: Tenant, req: AskReq, q: str, lang: str, room_id: Optional[str], level: int = 0) -> AskResp:
+    """Second half of the pipeline: answer from the chosen room's text."""
+    is_en = lang.startswith("en")
+    if not q:
+        msg = "Domanda vuota." if not is_en else "Empty question."
+        return AskResp(answer=msg, citations=[], lang=lang, dont_know=True)
 
-    if not room_id or room_id not in ROOM_DATA:
+    if not room_id or room_id not in tenant.room_data:
         msg = (
             "Non lo so. Non riesco a capire a quale sala si riferisce la domanda."
             if not is_en
             else "I don't know. I couldn't determine which room this question refers to."
         )
-        return AskResp(answer=msg, citations=[], lang=lang)
+        return AskResp(answer=msg, citations=[], lang=lang, dont_know=True)
 
     # --------------------------------------------------
     # Build context from the chosen room
     # --------------------------------------------------
-    room = ROOM_DATA[room_id]
+    room = tenant.room_data[room_id]
 
     # For English, prefer curated English text; otherwise use Italian text
     if is_en and room.get("text_en"):
@@ -943,55 +1789,165 @@ def ask(req: AskReq):
         context = room["text_it"]
 
     # DEBUG: show which room and how much context we are sending
-    print(f"[ASK] lang={lang} room_id={room_id} heading={room['heading']!r}")
+    print(f"[ASK] museum={tenant.tenant_id} lang={lang} room_id={room_id} heading={room['heading']!r}")
+    if is_en and room.get("text_en") and room["text_en_machine"]:
+        print("[ASK] English context is machine-translated")
     print(f"[ASK] context length = {len(context)} chars")
+    trace = CURRENT_TRACE.get()
+    if trace is not None:
+        trace.info["context_chars"] = len(context)
     print(f"[ASK] context preview = {context[:200]!r}\n")
 
+    # --------------------------------------------------
+    # Extractive shortcuts: explicit fast mode, or a short question that one
+    # sentence of the room answers with high similarity
+    # --------------------------------------------------
+    fast = (req.mode or "").lower() == "fast"
+    short = EXTRACTIVE_SHORT_Q_WORDS > 0 and not req.history and len(q.split()) <= EXTRACTIVE_SHORT_Q_WORDS
+    if ENABLE_EXTRACTIVE and (fast or short):
+        extract, sim = extractive_answer(tenant, q, lang, room_id)
+        if fast or sim >= EXTRACTIVE_SHORT_MIN_SIM:
+            path = "fast" if fast else "short"
+            EXTRACTIVE_STATS.record(path)
+            trace_decision(f"extractive:{path}", extractive_sim=sim)
+            dont_know = not extract or sim < EXTRACTIVE_MIN_SIM
+            if dont_know:
+                extract = dont_know_message(tenant, lang)
+            return AskResp(
+                answer=extract, citations=room_citations(room, sim), lang=lang, mode="extractive", dont_know=dont_know
+            )
+
     # --------------------------------------------------
     # Call local LLM with room context + (optional) history
     # --------------------------------------------------
     answer = call_llm_with_room(
+        tenant,
         context=context,
         question=q,
         lang=lang,
         # For the museum info room we ignore chat history
-        history=None if room_id == INFO_ROOM_ID else req.history,
+        history=None if room_id == tenant.info_room_id else req.history,
+        level=level,
     )
+    mode, score = "llm", 1.0
+    if not answer:
+        # Ollama down, saturated or timed out: the room's own sentences beat "don't know"
+        cancel = CANCEL_EVENT.get()
+        sim = 0.0
+        if ENABLE_EXTRACTIVE and not (cancel is not None and cancel.is_set()):
+            answer, sim = extractive_answer(tenant, q, lang, room_id)
+            EXTRACTIVE_STATS.record("fallback" if answer and sim >= EXTRACTIVE_MIN_SIM else "fallback_empty")
+            trace_decision("extractive:fallback", extractive_sim=sim)
+        if answer and sim >= EXTRACTIVE_MIN_SIM:
+            mode, score = "extractive-fallback", sim
+        else:
+            mode, answer = "llm-failed", dont_know_message(tenant, lang)
 
     # If the model says it doesn't know, always point to staff / website / contacts
     dont_know_en = "I don't know, please check the website for more information"
     dont_know_it = "Non lo so sulla base del testo fornito, per queste informazioni chiedi al personale"
 
+    phone, email = tenant.profile["phone"], tenant.profile["email"]
+    # The prompt asks for dont_know_message() verbatim when the room has no answer
+    dont_know = dont_know_message(tenant, lang) in answer or (dont_know_en if is_en else dont_know_it) in answer
+
     if is_en and dont_know_en in answer:
         answer = (
             f"{dont_know_en} "
             "For this information, please ask a member of staff or contact the museum at "
-            "+39 085 451 0026 or museo@gentidabruzzo.it, or check the official website."
+            f"{phone + ' or ' if phone else ''}{email}, or check the official website."
         )
 
     if (not is_en) and dont_know_it in answer:
         answer = (
             f"{dont_know_it} "
-            "Per queste informazioni chiedi al personale oppure contatta il museo al "
-            "+39 085 451 0026 o via email a museo@gentidabruzzo.it, "
+            "Per queste informazioni chiedi al personale oppure contatta il museo "
+            f"{'al ' + phone + ' o ' if phone else ''}via email a {email}, "
             "oppure consulta il sito ufficiale."
         )
 
 
+    return AskResp(answer=answer, citations=room_citations(room, score), lang=lang, mode=mode, dont_know=dont_know)
+
+
+def room_citations(room: dict, score: float) -> List[Citation]:
     citations: List[Citation] = []
     if room.get("url"):
         citations.append(
             Citation(
                 url=room["url"],
                 heading=room["heading"],
-                score=1.0,
+                score=score,
             )
         )
-
-    return AskResp(answer=answer, citations=citations, lang=lang)
+    return citations
 
 
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True, "rooms": len(ROOM_IDS)}
+    tenant = get_tenant(DEFAULT_TENANT)
+    return {"ok": True, "rooms": len(tenant.room_ids), "tenants": TENANTS.loaded()}
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "degradation": LOAD.snapshot(),
+        "tenants": TENANTS.loaded(),
+        "speculation": SPEC_STATS.snapshot(),
+        "extractive": EXTRACTIVE_STATS.snapshot(),
+        "query_log": QUERY_LOG.stats() if QUERY_LOG is not None else None,
+    }
+
+
+def require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.post("/admin/profile")
+def admin_profile_start(
+    n_requests: int = Query(0, alias="requests"),
+    seconds: float = 0.0,
+    interval_ms: float = 5.0,
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """Sample all busy threads for the next `requests` /ask calls or `seconds`."""
+    require_admin(x_admin_token)
+    try:
+        return PROFILER.start(requests=n_requests, seconds=seconds, interval_ms=interval_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profile")
+def admin_profile_report(format: str = "json", x_admin_token: Optional[str] = Header(default=None)):
+    """Last session: status + hottest functions (json) or collapsed stacks for flamegraphs (folded)."""
+    require_admin(x_admin_token)
+    if format == "folded":
+        return PlainTextResponse(PROFILER.folded())
+    return {**PROFILER.status(), "top": PROFILER.top_functions()}
+
+
+@app.delete("/admin/profile")
+def admin_profile_stop(x_admin_token: Optional[str] = Header(default=None)):
+    require_admin(x_admin_token)
+    PROFILER.stop()
+    return PROFILER.status()
+
+
+@app.on_event("shutdown")
+def close_query_log():
+    if QUERY_LOG is not None:
+        QUERY_LOG.close()
+
+
+@app.get("/t/{museum}/healthz")
+def healthz_tenant(museum: str):
+    tenant = get_tenant(museum)
+    return {"ok": True, "museum": tenant.tenant_id, "rooms": len(tenant.room_ids), "content_hash": tenant.content_hash}
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Static files for the chat widget, served precompressed and cacheable.
+
+`python app/static_files.py web` writes embed.html.gz (and embed.html.br when
+the optional `brotli` package is installed) next to every text asset. The
+server then sends the smallest variant the browser accepts, with a long
+Cache-Control, so repeat visits are answered by the browser cache or a
+proxy/CDN in front of us. A reverse proxy can serve the same files without
+Python at all (nginx: gzip_static on; brotli_static on;).
+"""
+import argparse
+import gzip
+import mimetypes
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_EXT = (".html", ".js", ".css", ".json", ".svg", ".txt", ".webmanifest")
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves file.br / file.gz when present, fresh and accepted."""
+
+    def __init__(self, *args, cache_control: str = "", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        accepted = {e.split(";")[0].strip() for e in request_headers.get("accept-encoding", "").split(",")}
+
+        response = None
+        for encoding, ext in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                st = os.stat(f"{full_path}{ext}")
+            except OSError:
+                continue
+            # Ignore a compressed copy older than the file it was made from
+            if st.st_mtime < stat_result.st_mtime:
+                continue
+            response = FileResponse(
+                f"{full_path}{ext}",
+                status_code=status_code,
+                stat_result=st,
+                media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding},
+            )
+            break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        if self.cache_control:
+            response.headers["Cache-Control"] = self.cache_control
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def compress_dir(directory: str) -> list:
+    """Write .gz (and .br) next to every compressible file that changed since the last run."""
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXT):
+                continue
+            path = os.path.join(root, name)
+            mtime = os.stat(path).st_mtime
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for ext, compress in variants:
+                out = path + ext
+                if os.path.exists(out) and os.stat(out).st_mtime >= mtime:
+                    continue
+                tmp = f"{out}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(compress(data))
+                os.replace(tmp, out)
+                written.append(out)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress static assets (gzip, brotli if installed).")
+    parser.add_argument("directory", nargs="?", default="web")
+    args = parser.parse_args()
+    for path in compress_dir(args.directory):
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+    if brotli is None:
+        print("brotli not installed: wrote gzip only (pip install brotli for .br files)")
+
+
+if __name__ == "__main__":
+    main()
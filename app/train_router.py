@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Train the learned room router (router.npz) for one museum.
+
+Labeled questions come from:
+  - the structured query log (--query-log): LLM-classified and QR-scoped asks,
+  - server stdout logs (--log): "[ROOM] LLM classifier chose: <room> q=..." and
+    "[ROOM] QR scope: <room> q=..." lines (older logs without q= are paired
+    with the preceding "[ROOM-CLS] user_msg preview" line),
+  - synthetic questions: sentences of the classifier room descriptions and of
+    the room texts, plus optional LLM-generated visitor questions per room.
+
+Usage:
+    python app/train_router.py --query-log "logs/queries-*.jsonl.gz" [--log server.log] [--museum gda] [--synth-llm 10]
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+import requests
+from sentence_transformers import SentenceTransformer
+from dotenv import load_dotenv
+
+# Base directory = repository root (one level above app/)
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Allow both `python app/train_router.py` and `python -m app.train_router`
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.meta_store import open_store, passage_body  # noqa: E402
+from app.query_log import iter_records  # noqa: E402
+from app.museum_profiles import DEFAULT_PROFILE, GENERIC_PROFILE, TENANT_REQUIRED_KEYS, load_profile  # noqa: E402
+from app.room_router import (  # noqa: E402
+    ROUTER_NAME,
+    RoomRouter,
+    expected_calibration_error,
+    fit_softmax,
+    fit_temperature,
+)
+
+load_dotenv()
+
+INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(BASE_DIR, "index"))
+TENANTS_DIR = os.getenv("TENANTS_DIR", os.path.join(BASE_DIR, "tenants"))
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "gda")
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+LLM_MODEL = os.getenv("LLM_MODEL", "qwen2.5:7b-instruct-q4_0")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+ROUTER_MIN_CONF = float(os.getenv("ROUTER_MIN_CONF", "0.80"))
+
+CHOSE_RE = re.compile(r"\[ROOM\] LLM classifier chose: (\S+)(?: q=(.*))?$")
+QR_RE = re.compile(r"\[ROOM\] QR scope: (\S+) q=(.*)$")
+PREVIEW_RE = re.compile(r"\[ROOM-CLS\] user_msg preview: (.*)$")
+PREVIEW_Q_RE = re.compile(
+    r"^(?:Visitor question|Domanda del visitatore):\n(.*?)\n\n"
+    r"(?:Previous related user questions|Candidate rooms|Sale candidate)",
+    re.S,
+)
+SENT_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def parse_logs(paths: list) -> list:
+    """(question, room_id, source) triples from server stdout logs."""
+    out = []
+    for path in paths:
+        pending = None
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                m = PREVIEW_RE.search(line)
+                if m:
+                    try:
+                        preview = ast.literal_eval(m.group(1))
+                    except (ValueError, SyntaxError):
+                        continue
+                    mq = PREVIEW_Q_RE.search(preview)
+                    # Previews are cut at 200 chars; skip questions we cannot see whole
+                    pending = mq.group(1).strip() if mq else None
+                    continue
+                m = CHOSE_RE.search(line)
+                if m:
+                    question = ast.literal_eval(m.group(2)) if m.group(2) else pending
+                    if question:
+                        out.append((question, m.group(1), "llm-log"))
+                    pending = None
+                    continue
+                m = QR_RE.search(line)
+                if m:
+                    out.append((ast.literal_eval(m.group(2)), m.group(1), "qr-log"))
+    return out
+
+
+ANSWER_STEPS = ("spec-", "extractive:")
+
+
+def parse_query_logs(paths: list, museum: str) -> list:
+    """(question, room_id, source) from query-log records routed by the LLM or a QR code."""
+    out = []
+    for rec in iter_records(paths):
+        if rec.get("museum") != museum or not rec.get("decision") or not rec.get("room_id"):
+            continue
+        # Answer-stage steps (speculation, extractive answers) follow the routing ones
+        steps = [d for d in rec["decision"] if not d.startswith(ANSWER_STEPS)]
+        if not steps:
+            continue
+        step = steps[-1]
+        if step.startswith("llm:"):
+            out.append((rec["question"], rec["room_id"], "llm-log"))
+        elif step == "qr":
+            out.append((rec["question"], rec["room_id"], "qr-log"))
+    return out
+
+
+def synth_from_texts(room_ids: list, profile: dict, rooms: dict, per_room: int, rng) -> list:
+    """Description sentences and a sample of room-text sentences as pseudo-questions."""
+    out = []
+    descriptions = profile.get("room_descriptions") or {}
+    for rid in room_ids:
+        desc = descriptions.get(rid)
+        if desc:
+            parts = desc if isinstance(desc, (tuple, list)) else [desc]
+            for part in parts:
+                for sent in SENT_RE.split(str(part)):
+                    if len(sent.split()) >= 4:
+                        out.append((sent.strip(), rid, "description"))
+        sents = []
+        for text in rooms.get(rid, []):
+            sents.extend(s.strip() for s in SENT_RE.split(text) if len(s.split()) >= 5)
+        if sents:
+            for i in rng.permutation(len(sents))[:per_room]:
+                out.append((sents[i], rid, "room-text"))
+    return out
+
+
+def synth_with_llm(room_ids: list, profile: dict, n_per_room: int) -> list:
+    """Ask the local LLM for visitor questions per room, in Italian and English."""
+    out = []
+    descriptions = profile.get("room_descriptions") or {}
+    for rid in room_ids:
+        desc = descriptions.get(rid)
+        if not desc:
+            continue
+        desc = " ".join(desc) if isinstance(desc, (tuple, list)) else str(desc)
+        for lang, instruction in (
+            ("en", f"Write {n_per_room} short, varied questions a museum visitor could ask about this room, in English."),
+            ("it", f"Scrivi {n_per_room} domande brevi e varie che un visitatore potrebbe fare su questa sala, in italiano."),
+        ):
+            payload = {
+                "model": LLM_MODEL,
+                "messages": [
+                    {"role": "system", "content": "Reply with one question per line and nothing else."},
+                    {"role": "user", "content": f"{instruction}\n\nRoom description:\n{desc}"},
+                ],
+                "stream": False,
+                "options": {"temperature": 0.7},
+            }
+            try:
+                resp = requests.post(f"{OLLAMA_URL}/api/chat", json=payload, timeout=300)
+                resp.raise_for_status()
+                content = resp.json().get("message", {}).get("content", "")
+            except Exception as e:
+                print(f"[SYNTH] {rid} ({lang}) failed: {e}")
+                continue
+            for line in content.splitlines():
+                q = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", line).strip()
+                if q.endswith("?"):
+                    out.append((q, rid, f"llm-synth-{lang}"))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the learned room router for one museum.")
+    parser.add_argument("--museum", default=DEFAULT_TENANT)
+    parser.add_argument("--query-log", action="append", default=[], help="query log file or glob (repeatable)")
+    parser.add_argument("--log", action="append", default=[], help="server stdout log (repeatable)")
+    parser.add_argument("--room-sentences", type=int, default=20, help="room-text sentences per room")
+    parser.add_argument("--synth-llm", type=int, default=0, help="LLM-generated questions per room and language")
+    parser.add_argument("--val-fraction", type=float, default=0.2)
+    args = parser.parse_args()
+
+    is_default = args.museum == DEFAULT_TENANT
+    index_dir = INDEX_DIR if is_default else os.path.join(TENANTS_DIR, args.museum)
+    if is_default:
+        profile = load_profile(index_dir, DEFAULT_PROFILE)
+    else:
+        profile = load_profile(index_dir, GENERIC_PROFILE, required=TENANT_REQUIRED_KEYS)
+    store = open_store(index_dir)
+
+    rooms: dict = {}
+    for rec in store.iter_chunks(scope_type="room"):
+        rooms.setdefault(rec["scope_id"], []).extend(
+            t for t in (passage_body(rec, "it"), passage_body(rec, "en")) if t
+        )
+    rooms[profile["info_room_id"]] = [profile["info_it"], profile["info_en"]]
+    room_ids = sorted(rooms)
+
+    rng = np.random.default_rng(0)
+    examples = parse_query_logs(args.query_log, args.museum) + parse_logs(args.log)
+    examples += synth_from_texts(room_ids, profile, rooms, args.room_sentences, rng)
+    if args.synth_llm:
+        examples += synth_with_llm(room_ids, profile, args.synth_llm)
+    examples = [(q, rid, src) for q, rid, src in examples if rid in rooms and q.strip()]
+    if not examples:
+        raise RuntimeError("No training examples; pass --query-log / --log or check the room descriptions.")
+
+    print(f"Examples: {len(examples)} by source {dict(Counter(src for _, _, src in examples))}")
+    missing = [rid for rid in room_ids if rid not in {e[1] for e in examples}]
+    if missing:
+        print(f"Rooms without examples (router will never pick them): {', '.join(missing)}")
+
+    labels = sorted({rid for _, rid, _ in examples})
+    label_idx = {rid: i for i, rid in enumerate(labels)}
+    model = SentenceTransformer(EMBED_MODEL)
+    X = np.asarray(
+        model.encode([q for q, _, _ in examples], normalize_embeddings=True, batch_size=64, show_progress_bar=True),
+        dtype=np.float32,
+    )
+    y = np.array([label_idx[rid] for _, rid, _ in examples])
+
+    # Hold out a validation split for temperature scaling and the report. The
+    # saved router is the train-split model: a refit on all rows would not be
+    # the model whose temperature, accuracy and ECE were measured.
+    order = rng.permutation(len(y))
+    n_val = int(len(y) * args.val_fraction)
+    val, train = order[:n_val], order[n_val:]
+    temperature = 1.0
+    if n_val >= 20:
+        W, b = fit_softmax(X[train], y[train], len(labels))
+        logits = X[val] @ W + b
+        raw = RoomRouter(W, b, labels, 1.0).predict_proba(X[val])
+        temperature = fit_temperature(logits, y[val])
+        cal = RoomRouter(W, b, labels, temperature).predict_proba(X[val])
+        acc = float((cal.argmax(axis=1) == y[val]).mean())
+        conf = cal.max(axis=1)
+        confident = conf >= ROUTER_MIN_CONF
+        print(f"Validation: n={n_val} accuracy={acc:.3f} temperature={temperature:.3f}")
+        print(f"  ECE before={expected_calibration_error(raw, y[val]):.3f} "
+              f"after={expected_calibration_error(cal, y[val]):.3f}")
+        if confident.any():
+            acc_conf = float((cal.argmax(axis=1)[confident] == y[val][confident]).mean())
+            print(f"  conf >= {ROUTER_MIN_CONF}: {confident.mean():.1%} of questions routed without LLM, "
+                  f"accuracy {acc_conf:.3f}")
+    else:
+        print("Too few examples for a validation split; fitting on everything, temperature=1.0 (uncalibrated)")
+        W, b = fit_softmax(X, y, len(labels))
+
+    router = RoomRouter(W, b, labels, temperature, EMBED_MODEL)
+    out = os.path.join(index_dir, ROUTER_NAME)
+    router.save(out)
+    print(f"Wrote router → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Machine translation of missing English texts at ingest time.
+
+Passages without a curated text_en are translated IT -> EN through the
+local Ollama, several per request. Ingest runs this after the chunker, so
+every input is a token-bounded passage; num_ctx is sized for each request and
+texts that could never fit in TRANSLATE_MAX_CTX are skipped up front instead
+of failing on every run. Every translation is appended to a JSONL cache
+(<index dir>/translations.jsonl) keyed by the SHA-1 of model + passage text,
+so an interrupted run resumes where it stopped, unchanged passages are never
+translated twice and a new model translates again. Translated passages are
+stored with text_en_source="machine" in meta.sqlite; curated ones with
+"curated".
+
+    python app/ingest.py translate      # fill the cache without rebuilding
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+import requests
+
+from app.meta_store import passage_body
+
+TRANSLATIONS_NAME = "translations.jsonl"
+# Conservative for Italian/English with Qwen-style tokenizers
+CHARS_PER_TOKEN = 3
+
+SYSTEM_PROMPT = (
+    "You translate official museum texts from Italian to English.\n"
+    'You receive a JSON object {"texts": [...]} with Italian texts. Reply with a JSON object '
+    '{"translations": [...]} holding the English translation of each text, in the same order '
+    "and with the same number of items.\n"
+    "Translate faithfully: keep every name, number and date, do not summarise, explain or add anything."
+)
+
+
+def text_key(text_it: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\0{text_it.strip()}".encode("utf-8")).hexdigest()
+
+
+def ctx_tokens(texts: List[str]) -> int:
+    """Context a request needs: prompt, the texts as JSON and about as much again for the reply."""
+    chars = len(SYSTEM_PROMPT) + sum(2 * len(t) + 16 for t in texts)
+    return chars // CHARS_PER_TOKEN + 256
+
+
+def _needs_translation(rec: dict) -> bool:
+    return not rec.get("text_en") and not rec.get("curated_en")
+
+
+def load_cache(path: str) -> Dict[str, str]:
+    """key -> text_en from the translation cache; a torn last line (crash) is ignored."""
+    cache: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return cache
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("key") and rec.get("text_en"):
+                cache[rec["key"]] = rec["text_en"]
+    return cache
+
+
+def _batches(texts: List[str], max_rows: int, max_chars: int, max_ctx: int) -> List[List[str]]:
+    out: List[List[str]] = []
+    batch: List[str] = []
+    chars = 0
+    for t in texts:
+        if batch and (len(batch) >= max_rows or chars + len(t) > max_chars or ctx_tokens(batch + [t]) > max_ctx):
+            out.append(batch)
+            batch, chars = [], 0
+        batch.append(t)
+        chars += len(t)
+    if batch:
+        out.append(batch)
+    return out
+
+
+def translate_batch(texts: List[str], url: str, model: str, timeout: float = 600) -> List[str]:
+    """English translations of `texts`, in order. Raises on a malformed reply."""
+    # Ollama's default context is small and silently cuts long prompts/replies
+    num_ctx = -(-ctx_tokens(texts) // 1024) * 1024
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps({"texts": texts}, ensure_ascii=False)},
+        ],
+        "stream": False,
+        "format": "json",
+        "options": {"temperature": 0.0, "num_ctx": max(num_ctx, 2048)},
+    }
+    resp = requests.post(f"{url}/api/chat", json=payload, timeout=timeout)
+    resp.raise_for_status()
+    content = resp.json().get("message", {}).get("content", "")
+    out = json.loads(content).get("translations")
+    if not isinstance(out, list) or len(out) != len(texts) or not all(isinstance(t, str) and t.strip() for t in out):
+        raise ValueError(f"expected {len(texts)} translations, got {content[:200]!r}")
+    return [t.strip() for t in out]
+
+
+def translate_records(
+    records: List[dict],
+    cache_path: str,
+    url: str,
+    model: str,
+    batch_rows: int = 8,
+    batch_chars: int = 6000,
+    workers: int = 2,
+    max_ctx: int = 8192,
+) -> int:
+    """
+    Fill text_en of records that lack it, from the cache or through Ollama.
+
+    The passage body (without the overlap repeated from the previous passage)
+    is translated, so the English passage gets overlap_en=0. Passages of a
+    row with curated English (curated_en, set by the chunker) are never
+    machine-translated, even when they got no English sentence. Sets
+    text_en_source on every record with an English text and returns the number
+    of machine-translated records. Passages that cannot be translated (Ollama
+    down, malformed replies, too long) stay Italian-only; rerunning resumes
+    from the cache.
+    """
+    for rec in records:
+        if rec.get("text_en"):
+            rec.setdefault("text_en_source", "curated")
+
+    missing = list(dict.fromkeys(passage_body(rec, "it") for rec in records if _needs_translation(rec)))
+    missing = [t for t in missing if t]
+    cache = load_cache(cache_path)
+    todo = [t for t in missing if text_key(t, model) not in cache]
+    print(f"Translate: {len(missing)} distinct texts without text_en, "
+          f"{len(missing) - len(todo)} cached, {len(todo)} to translate with {model}")
+    too_long = [t for t in todo if ctx_tokens([t]) > max_ctx]
+    if too_long:
+        print(f"[TRANSLATE] {len(too_long)} texts need more than {max_ctx} context tokens and are skipped; "
+              "enable the chunker or raise TRANSLATE_MAX_CTX")
+        todo = [t for t in todo if ctx_tokens([t]) <= max_ctx]
+
+    if todo:
+        unreachable = threading.Event()
+        done = failed = 0
+        t0 = time.perf_counter()
+
+        def run(batch: List[str]) -> List[tuple]:
+            if unreachable.is_set():
+                return []
+            try:
+                return list(zip(batch, translate_batch(batch, url, model)))
+            except requests.ConnectionError:
+                unreachable.set()
+                return []
+            except Exception as e:
+                if len(batch) == 1:
+                    print(f"[TRANSLATE] failed: {e}")
+                    return []
+                # One bad reply should not lose the whole batch: retry row by row
+                print(f"[TRANSLATE] batch of {len(batch)} failed ({e}), retrying one by one")
+                out = []
+                for t in batch:
+                    out.extend(run([t]))
+                return out
+
+        with open(cache_path, "a", encoding="utf-8") as f, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run, b): b for b in _batches(todo, batch_rows, batch_chars, max_ctx)}
+            # Only this thread writes the cache
+            for fut in as_completed(futures):
+                pairs = fut.result()
+                for text_it, text_en in pairs:
+                    cache[text_key(text_it, model)] = text_en
+                    f.write(json.dumps(
+                        {"key": text_key(text_it, model), "text_en": text_en, "model": model, "ts": int(time.time())},
+                        ensure_ascii=False,
+                    ) + "\n")
+                # Flushed per batch: an interrupted run keeps everything translated so far
+                f.flush()
+                done += len(pairs)
+                failed += len(futures[fut]) - len(pairs)
+        print(f"Translate: {done} translated, {failed} failed in {time.perf_counter() - t0:.1f}s → {cache_path}")
+        if unreachable.is_set():
+            print(f"[TRANSLATE] Ollama at {url} is unreachable; untranslated rows stay Italian-only, rerun to resume")
+
+    translated = 0
+    for rec in records:
+        if _needs_translation(rec):
+            text_en = cache.get(text_key(passage_body(rec, "it"), model))
+            if text_en:
+                rec["text_en"] = text_en
+                rec["overlap_en"] = 0
+                rec["text_en_source"] = "machine"
+                translated += 1
+    return translated
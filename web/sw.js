@@ -0,0 +1,65 @@
+// Service worker for the chat widget.
+//  - widget files: served from cache, refreshed in the background
+//  - room answer packs (/pack/<room_id>): network first, cached copy when offline
+//  - everything else (POST /ask, ...) goes straight to the network
+
+const CACHE = "museum-chat-v1";
+const ASSETS = ["embed.html", "chatbot_answering.png", "chatbot_thinking.png"];
+
+self.addEventListener("install", event => {
+  event.waitUntil(
+    caches.open(CACHE).then(cache =>
+      // One missing image must not stop the widget from being cached
+      Promise.all(ASSETS.map(a => cache.add(a).catch(() => null)))
+    ).then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k))))
+      .then(() => self.clients.claim())
+  );
+});
+
+async function networkFirst(request){
+  const cache = await caches.open(CACHE);
+  try {
+    const res = await fetch(request);
+    if (res.ok) cache.put(request, res.clone());
+    return res;
+  } catch (err) {
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    throw err;
+  }
+}
+
+async function staleWhileRevalidate(event){
+  const cache = await caches.open(CACHE);
+  const cached = await cache.match(event.request, { ignoreSearch: true });
+  const refresh = fetch(event.request)
+    .then(res => {
+      if (res.ok) cache.put(event.request, res.clone());
+      return res;
+    })
+    .catch(() => null);
+  if (cached) {
+    event.waitUntil(refresh);
+    return cached;
+  }
+  return (await refresh) || Response.error();
+}
+
+self.addEventListener("fetch", event => {
+  const req = event.request;
+  if (req.method !== "GET") return;
+
+  const url = new URL(req.url);
+  if (/\/pack\/[^/]+$/.test(url.pathname)) {
+    event.respondWith(networkFirst(req));
+  } else if (url.origin === self.location.origin && url.pathname.startsWith(new URL("./", self.location).pathname)) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});